@@ -0,0 +1,54 @@
+# Click latency of ShapeTable against the number of faces.
+#
+#   python benchmarks/bench_update_gui.py [face counts ...]
+#
+# Needs the meshing_app package (and webapp_client) importable.
+#
+# Uses a stand-in for the viewer that only records what would be sent to the
+# browser, so the numbers show the server side cost of a click.
+import sys
+import time
+
+from meshing_app.app import ShapeTable
+
+
+class Viewer:
+    def __init__(self, n_faces, n_edges):
+        self._webgui_data = {
+            "colors": [(0.7, 0.7, 0.7, 1)] * n_faces,
+            "edge_colors": [(0, 0, 0, 1)] * n_edges,
+        }
+        self.sent = 0
+
+    def set_color(self, faces, edges):
+        self.sent += len(faces) + len(edges)
+
+
+class Shape:
+    name = None
+    maxh = 1e99
+
+
+def click_latency(n_faces, clicks=50):
+    viewer = Viewer(n_faces, 2 * n_faces)
+    table = ShapeTable(viewer, "faces")
+    table.set_shapes([Shape() for _ in range(n_faces)])
+    # the stand-in viewer holds drawn geometry data from the start
+    table.colors.drawn = True
+    table.update_gui()
+    viewer.sent = 0
+    start = time.perf_counter()
+    for i in range(clicks):
+        table.click_row({"arg": {"row": (i * 7919) % n_faces}})
+    elapsed = (time.perf_counter() - start) / clicks
+    if not viewer.sent:
+        raise RuntimeError("clicks pushed no colours, nothing was measured")
+    return elapsed, viewer.sent / clicks
+
+
+if __name__ == "__main__":
+    counts = [int(n) for n in sys.argv[1:]] or [1000, 10000, 50000, 100000]
+    print(f"{'faces':>10} {'ms/click':>10} {'colors/click':>13}")
+    for n in counts:
+        latency, sent = click_latency(n)
+        print(f"{n:>10} {latency * 1e3:>10.3f} {sent:>13.1f}")
@@ -0,0 +1,28 @@
+# Procedurally generated reference geometries for the benchmarks. Sizes are
+# controlled by a single count, so results of different runs are comparable.
+import netgen.occ as ngocc
+
+
+def box_with_holes(n):
+    # one solid, the number of faces grows linearly with n
+    box = ngocc.Box((0, 0, 0), (n + 1, 1, 1))
+    for i in range(n):
+        box = box - ngocc.Cylinder((i + 1, 0.5, -1), ngocc.Z, r=0.25, h=3)
+    return box
+
+
+def solid_array(k):
+    # k x k glued boxes with conforming interfaces
+    return ngocc.Glue(
+        [
+            ngocc.Box((i, j, 0), (i + 1, j + 1, 1))
+            for i in range(k)
+            for j in range(k)
+        ]
+    )
+
+
+geometries = {
+    "box_with_holes": box_with_holes,
+    "solid_array": solid_array,
+}
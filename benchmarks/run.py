@@ -0,0 +1,156 @@
+# Benchmark suite for the geometry loading, table and meshing paths.
+#
+#   python benchmarks/run.py -o results.json
+#   python benchmarks/run.py --quick --baseline results.json
+#
+# Needs netgen and the meshing_app package (and webapp_client) importable.
+#
+# Every timing is the best of --repeat runs. With --baseline the run fails
+# (exit code 1) if a timing got slower by more than --tolerance compared to
+# the baseline file.
+import argparse
+import json
+import platform
+import sys
+import time
+
+from geometries import geometries
+from meshing_app.app import MainLayout
+from meshing_app.meshing import generate_mesh, mesh_options
+from meshing_app.topology import Topology
+
+sizes = {"box_with_holes": [10, 50, 200], "solid_array": [2, 5, 10]}
+quick_sizes = {"box_with_holes": [10], "solid_array": [2]}
+quick_levels = ["very_coarse", "moderate"]
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def wait_drawn(layout, timeout=600):
+    # large geometries are tessellated and drawn in the background, the
+    # tables only push colours once the geometry is drawn
+    start = time.perf_counter()
+    while not layout.geo_colors.drawn:
+        if time.perf_counter() - start > timeout:
+            raise RuntimeError("geometry was not drawn")
+        time.sleep(0.01)
+
+
+def count_pushes(webgui):
+    # colour updates sent to the viewer
+    pushes = []
+    set_color = webgui.set_color
+
+    def counting(*args, **kwargs):
+        pushes.append(1)
+        return set_color(*args, **kwargs)
+
+    webgui.set_color = counting
+    return pushes
+
+
+def bench_case(shape, repeat, levels):
+    results = {}
+    layout = MainLayout()
+    results["build_from_shape"] = best_of(
+        repeat, lambda: layout.build_from_shape(shape, "bench")
+    )
+    wait_drawn(layout)
+    table = layout.face_table
+    results["set_shapes"] = best_of(repeat, lambda: table.set_shapes(shape.faces))
+    results["set_shapes/solids"] = best_of(
+        repeat,
+        lambda: layout.solid_table.set_shapes(shape.solids, Topology(shape)),
+    )
+    results["estimate"] = best_of(repeat, layout.estimate)
+    n_faces = len(table.shapes)
+    for i in range(0, n_faces, 2):
+        table.set_name({"value": f"face_{i}", "arg": {"row": i}})
+    table.update_gui()
+
+    def click():
+        for i in range(20):
+            table.click_row({"arg": {"row": (i * 7919) % n_faces}})
+
+    pushes = count_pushes(layout.webgui)
+    results["update_gui"] = best_of(repeat, click) / 20
+    if not pushes:
+        raise RuntimeError("clicks pushed no colours, update_gui was not measured")
+    results["search"] = best_of(
+        repeat,
+        lambda: [table.search({"value": q}) for q in ("f", "fa", "face_1", "")],
+    ) / 4
+    for level in levels:
+        results[f"generate_mesh/{level}"] = best_of(
+            1, lambda: generate_mesh(shape.Move((0, 0, 0)), 3, mesh_options[level])
+        )
+    return results
+
+
+def compare(results, baseline, tolerance, min_difference=1e-3):
+    regressions = []
+    for key, value in sorted(results.items()):
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if value > old * (1 + tolerance) and value - old > min_difference:
+            regressions.append((key, old, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the meshing app benchmarks.")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--quick", action="store_true", help="small sizes and coarse meshes only"
+    )
+    args = parser.parse_args(argv)
+
+    import netgen
+
+    results = {}
+    for name, counts in (quick_sizes if args.quick else sizes).items():
+        for i, count in enumerate(counts):
+            shape = geometries[name](count)
+            # meshing is only timed for the smallest size
+            levels = quick_levels if args.quick else list(mesh_options)
+            case = bench_case(shape, args.repeat, levels if i == 0 else [])
+            for key, value in case.items():
+                results[f"{name}/{count}/{key}"] = value
+                print(f"{name}/{count}/{key:<30} {value * 1e3:10.2f} ms", flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "netgen": getattr(netgen, "__version__", None),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old * 1e3:.2f} ms -> {new * 1e3:.2f} ms")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# Startup benchmarks: import times of the plugin, the app and netgen, the
+# time to open the first session through the registered plugin class and
+# the time to the first mesh of a session with and without the warm worker.
+#
+#   python benchmarks/startup.py -o startup.json
+#
+# Needs netgen and the meshing_app package (and webapp_client) importable.
+# The numbers depend on the webapp_client installed, its location and
+# version are stored with the results. Every number is the best of
+# --repeat fresh interpreters.
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+imports = {
+    "import/appconfig": "meshing_app.appconfig",
+    "import/app": "meshing_app.app",
+    "import/netgen.occ": "netgen.occ",
+}
+
+_import_code = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+# plugin discovery plus the first session, which imports the app module
+_first_session_code = """
+import time
+start = time.perf_counter()
+from meshing_app.appconfig import config
+config.python_class()
+print(time.perf_counter() - start)
+"""
+
+_webapp_client_code = """
+import webapp_client
+print(getattr(webapp_client, "__version__", None), webapp_client.__file__)
+"""
+
+# time from submitting a small job until its mesh is written, after the
+# session had a few seconds to warm up
+_first_mesh_code = """
+import os, tempfile, time
+import netgen.occ as ngocc
+from meshing_app.worker import MeshingJob, warm_up
+
+if __name__ == "__main__":
+    directory = tempfile.mkdtemp()
+    brep = os.path.join(directory, "box.brep")
+    ngocc.Box((0, 0, 0), (1, 1, 1)).WriteBrep(brep)
+    warm_up()
+    start = time.perf_counter()
+    job = MeshingJob(brep, 3, {{"maxh": 0.5}}, {{}}, os.path.join(directory, "box.vol"))
+    job.start().wait()
+    print(time.perf_counter() - start)
+"""
+
+
+def best_of(repeat, code, env=None):
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        ).stdout
+        elapsed = float(output.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the startup benchmarks.")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    webapp_client = subprocess.run(
+        [sys.executable, "-c", _webapp_client_code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    print(f"webapp_client {webapp_client}", flush=True)
+
+    results = {}
+    for key, module in imports.items():
+        results[key] = best_of(args.repeat, _import_code.format(module=module))
+        print(f"{key:<30} {results[key] * 1e3:10.2f} ms", flush=True)
+    key = "first_session"
+    results[key] = best_of(args.repeat, _first_session_code)
+    print(f"{key:<30} {results[key] * 1e3:10.2f} ms", flush=True)
+    for key, warm in (("first_mesh/cold", "0"), ("first_mesh/warm", "1")):
+        env = dict(os.environ, MESHING_APP_WARM_WORKER=warm)
+        results[key] = best_of(args.repeat, _first_mesh_code.format(), env)
+        print(f"{key:<30} {results[key] * 1e3:10.2f} ms", flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "webapp_client": webapp_client,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,9 @@
-from .appconfig import config
+# The plugin config pulls in webapp_client, only load it when it is asked for
+# so that the meshing core and the command line tool work without it.
+def __getattr__(name):
+    if name == "config":
+        from .appconfig import config
+
+        return config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -1,26 +1,79 @@
-from webapp_client.app import App, register_application, current_model
 from webapp_client.components import *
 from webapp_client.qcomponents import *
-from webapp_client.utils import temp_dir_with_files
 from webapp_client.visualization import WebguiComponent
-from .version import __version__
+from .meshing import mesh_options, meshing_parameters
+from .scheduler import scheduler
+from . import appconfig
+from .worker import MeshingJob, run_in_process, warm_up
+from .cache import (
+    case_geometries,
+    case_meshes,
+    geometry_cache,
+    hash_file,
+    hash_json,
+    mesh_cache,
+    mesh_key,
+)
+from .estimate import check_limits, estimate_mesh, limit_action
+from .export import compress_file, compressions, export_mesh, formats
+from .healing import (
+    default_tolerance,
+    heal_shape,
+    matches,
+    small_features,
+    transfer_properties,
+)
+from .quality import (
+    bad_elements,
+    highlight_mesh,
+    histogram,
+    max_angle,
+    max_aspect_ratio,
+    mesh_quality,
+    min_angle,
+    worst_elements,
+)
+from .timing import JobTimings, logger
+from .topology import Topology
+from .tessellation import (
+    Tessellation,
+    background_min_faces,
+    mesh_preview_min_elements,
+    n_triangles,
+    region_mesh,
+    surface_mesh,
+    tessellate,
+    tessellate_brep,
+    tessellations,
+)
 import webapp_client.api as api
+from array import array
 import datetime
-
-mesh_options = {
-    "very_coarse": {"curvaturesafety": 1, "segmentsperedge": 0.3, "grading": 0.7},
-    "coarse": {"curvaturesafety": 1.5, "segmentsperedge": 0.5, "grading": 0.5},
-    "moderate": {"curvaturesafety": 2, "segmentsperedge": 1, "grading": 0.3},
-    "fine": {"curvaturesafety": 3, "segmentsperedge": 2, "grading": 0.3},
-    "very_fine": {"curvaturesafety": 5, "segmentsperedge": 3, "grading": 0.1},
-}
+import fnmatch
+import gzip
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import urllib.parse
+import weakref
+
+import numpy as np
+
+# earlier meshes of a session whose files are kept, they may still be downloaded
+kept_meshes = 2
+# scheduler session of every layout, ids of collected layouts may be reused
+_sessions = itertools.count()
 
 
 class SimulationTable(QTable):
     def __init__(self, dialog):
         super().__init__(
             ui_title="Load Geometry",
-            ui_pagination={"rowsPerPage": 5},
+            ui_pagination={"page": 1, "rowsPerPage": 5, "rowsNumber": 0},
             ui_columns=[
                 {"name": "index", "label": "Index", "field": "index"},
                 {"name": "id", "label": "ID", "field": "id"},
@@ -42,25 +95,95 @@ class SimulationTable(QTable):
         ]
         self.ui_slot_body = self.create_row
         self.dialog = dialog
+        # Pages are fetched from the server when they are first shown and
+        # kept for the session, saving or deleting a case drops them.
+        self.on("request", self.request_page)
+        self.page = 1
+        self._pages = {}
+        self._listing = None
+        self._total = None
+
+    def invalidate(self):
+        self._pages = {}
+        self._listing = None
+        self._total = None
+
+    def fetch_page(self, offset, limit):
+        # later pages are checked against the first one
+        first = self.fetch_page(0, limit) if offset else None
+        if self._listing is not None:
+            return self._listing[offset : offset + limit]
+        if (offset, limit) not in self._pages:
+            app_id = self.dialog.app.metadata["app_id"]
+            query = urllib.parse.urlencode(
+                {"app_id": app_id, "deleted": "false", "offset": offset, "limit": limit}
+            )
+            res = api.get(f"/simulations?{query}")
+            sims = [s for s in res if s["app_id"] == app_id and not s["deleted"]]
+            # a server without paging sends more rows than asked for, or the
+            # first page again for a later offset: keep its whole listing
+            if len(res) > limit or (
+                first and sims and sims[0]["id"] == first[0]["id"]
+            ):
+                self._listing = sims
+                return sims[offset : offset + limit]
+            if len(res) < limit:
+                self._total = offset + len(sims)
+            self._pages[offset, limit] = sims
+        return self._pages[offset, limit]
+
+    def show_page(self, page):
+        rows_per_page = self.ui_pagination["rowsPerPage"]
+        self.page = max(page, 1)
+        offset = (self.page - 1) * rows_per_page
+        sims = self.fetch_page(offset, rows_per_page)
+        if self._listing is not None:
+            total = len(self._listing)
+        elif self._total is not None:
+            total = self._total
+        else:
+            # one more row than shown lets the table offer the next page
+            total = offset + len(sims) + 1
+        last_page = max(1, -(-total // rows_per_page))
+        if self.page > last_page:
+            return self.show_page(last_page)
+        self.ui_pagination = {
+            "page": self.page,
+            "rowsPerPage": rows_per_page,
+            "rowsNumber": total,
+        }
+        self.ui_rows = [s | {"index": offset + i} for i, s in enumerate(sims)]
+
+    def request_page(self, event):
+        pagination = event["value"]["pagination"]
+        if pagination.get("rowsPerPage"):
+            self.ui_pagination = self.ui_pagination | {
+                "rowsPerPage": pagination["rowsPerPage"]
+            }
+        self.show_page(pagination.get("page", 1))
 
     def load_simulation(self, event):
         self.dialog.ui_hide()
-        print("show loading")
         self.dialog.app.geo_uploading.ui_hidden = False
         file_id = event["arg"]["file_id"]
+        start = time.perf_counter()
         res = api.get(f"/model/{file_id}")
         import webapp_frontend
 
         webapp_frontend.set_file_id(file_id)
         self.dialog.app.load(data=res["data"], metadata=res["metadata"])
-        print("hide loading")
+        self.dialog.app.main_layout.timings.add(
+            "load_simulation", time.perf_counter() - start
+        )
+        self.dialog.app.main_layout.timings.log("load_simulation")
         self.dialog.app.geo_uploading.ui_hidden = True
 
     def delete_simulation(self, event):
         file_id = event["arg"]["file_id"]
         api.delete(f"/files/{file_id}")
         # TODO: can we somehow prevent propagation of on click here to row?
-        self.ui_rows = [r for r in self.ui_rows if r["id"] != file_id]
+        self.invalidate()
+        self.show_page(self.page)
 
     def create_row(self, props):
         row = props["row"]
@@ -90,15 +213,7 @@ class LoadDialog(QDialog):
 
     def show(self):
         super().ui_show()
-        res = api.get("/simulations")
-        sims = [
-            s
-            for s in res
-            if s["app_id"] == self.app.metadata["app_id"] and not s["deleted"]
-        ]
-        for i, s in enumerate(sims):
-            s["index"] = i
-        self.simulations.ui_rows = sims
+        self.simulations.show_page(1)
 
 class GlobalMeshingSettings(QCard):
     def __init__(self):
@@ -109,6 +224,7 @@ class GlobalMeshingSettings(QCard):
             self.grading.ui_model_value = mp["grading"]
 
         self.mesh_dimension = QBtnToggle(
+            id="mesh_dimension",
             ui_options=[{ "label" : "2D Mesh", "value" : 2},
                      { "label" : "3D Mesh", "value" : 3}],
             ui_model_value = 3,
@@ -169,6 +285,49 @@ class GlobalMeshingSettings(QCard):
             id="grading",
             ui_label=True,
         )
+        self.export_format = QSelect(
+            QTooltip(
+                Div(
+                    "File format of the downloaded mesh. Converted when selected.",
+                    ui_style="max-width:300px;",
+                )
+            ),
+            id="export_format",
+            ui_label="Download format",
+            ui_model_value="netgen",
+            ui_options=[
+                {"label": label + (f" ({ext})" if ext else ""), "value": fmt}
+                for fmt, (label, ext, _) in formats.items()
+            ],
+            ui_emit_value=True,
+            ui_map_options=True,
+            ui_style="margin-top:10px;min-width:200px;",
+        )
+        self.parallel = QCheckbox(
+            QTooltip(
+                Div(
+                    "Mesh the surface once, then volume mesh all solids in parallel. Only used for 3D meshes with several solids.",
+                    ui_style="max-width:300px;",
+                )
+            ),
+            id="parallel",
+            ui_label="Parallel volume meshing",
+            ui_model_value=False,
+            ui_style="margin-top:10px;",
+        )
+        self.compression = QSelect(
+            QTooltip(
+                Div(
+                    "Compression of the downloaded mesh file.",
+                    ui_style="max-width:300px;",
+                )
+            ),
+            id="compression",
+            ui_label="Download compression",
+            ui_model_value="none",
+            ui_options=list(compressions.keys()),
+            ui_style="margin-top:10px;min-width:200px;",
+        )
 
         super().__init__(
             Heading("Global Meshing Settings", 3),
@@ -188,26 +347,91 @@ class GlobalMeshingSettings(QCard):
                     ui_class="q-field__label",
                     ui_style="margin-top:10px;width:200px;",
                 ),
+            self.parallel,
+            self.export_format,
+            self.compression,
             id="global_settings",
             ui_style="margin:10px;padding:30px;",
             namespace=True,
         )
 
     def get_meshing_parameters(self):
-        mp = {}
-        if self.maxh.ui_model_value:
-            mp["maxh"] = float(self.maxh.ui_model_value)
-        if self.curvature_safety.ui_model_value:
-            mp["curvaturesafety"] = float(self.curvature_safety.ui_model_value)
-        if self.segments_per_edge.ui_model_value:
-            mp["segmentsperedge"] = float(self.segments_per_edge.ui_model_value)
-        if self.grading.ui_model_value:
-            mp["grading"] = float(self.grading.ui_model_value)
-        return mp
+        return meshing_parameters(
+            {
+                "maxh": self.maxh.ui_model_value,
+                "curvature_safety": self.curvature_safety.ui_model_value,
+                "segments_per_edge": self.segments_per_edge.ui_model_value,
+                "grading": self.grading.ui_model_value,
+            }
+        )
+
+
+# "12", "100-200" or "face 100-200"
+_index_query = re.compile(r"^(?:(?:solid|face|edge)s?\s*)?(\d+)(?:\s*-\s*(\d+))?$")
+# selection rules, e.g. "area < 0.1", "normal +z", "normal 1,0,0", "adjacent 2,5"
+_measure_query = re.compile(r"^(?:area|length|volume|size)\s*([<>]=?)\s*(\S+)$")
+_normal_query = re.compile(r"^normal\s+(?:([+-]?)([xyz])|(\S+?)[\s,]+(\S+?)[\s,]+(\S+))$")
+_adjacent_query = re.compile(r"^adjacent\s+(\d+(?:[\s,]+\d+)*)$")
+normal_tolerance = 1  # degrees
+
+
+class GeometryColors:
+    face_color = (0.7, 0.7, 0.7, 1)
+    edge_color = (0, 0, 0, 1)
+    selected_color = (1, 0, 0, 1)
+    hidden_color = (1, 1, 1, 0)
+
+    def __init__(self, webgui):
+        self.webgui = webgui
+        # table whose colouring is currently shown, others need a full repaint
+        self.owner = None
+        # viewer index of every face index, see Topology.face_viewer_index
+        self.face_map = None
+        # held while the geometry is drawn or coloured, the background draw
+        # of a tessellation runs in another thread
+        self.lock = threading.RLock()
+        # colours are only set once the current geometry is drawn
+        self.drawn = False
+
+    @property
+    def faces(self):
+        return self.webgui._webgui_data["colors"]
+
+    @property
+    def edges(self):
+        return self.webgui._webgui_data["edge_colors"]
+
+    def reset(self, face_map=None):
+        with self.lock:
+            self.owner = None
+            self.face_map = face_map
+            self.drawn = False
+
+    def set(self, faces=None, edges=None):
+        # faces and edges by their index in the tables
+        faces, edges = faces or {}, edges or {}
+        with self.lock:
+            if not self.drawn:
+                return
+            if self.face_map is not None:
+                face_map = self.face_map
+                faces = {face_map[i]: c for i, c in faces.items()}
+            changed_faces = {
+                i: c for i, c in faces.items() if tuple(self.faces[i]) != c
+            }
+            changed_edges = {
+                i: c for i, c in edges.items() if tuple(self.edges[i]) != c
+            }
+            for i, c in changed_faces.items():
+                self.faces[i] = c
+            for i, c in changed_edges.items():
+                self.edges[i] = c
+            if changed_faces or changed_edges:
+                self.webgui.set_color(faces=changed_faces, edges=changed_edges)
 
 
 class ShapeTable(QTable):
-    def __init__(self, geo_webgui, shape_type):
+    def __init__(self, geo_webgui, shape_type, colors=None):
         columns = [
             {"name": "index", "label": "Index", "field": "index"},
             {"name": "name", "label": "Name", "field": "name"},
@@ -221,11 +445,24 @@ class ShapeTable(QTable):
             ui_columns=columns,
             ui_style="min-width: 450px;height:650px;",
             ui_title="Shape Settings",
-            ui_pagination={"rowsPerPage": 6 },
+            ui_pagination={"page": 1, "rowsPerPage": 6, "rowsNumber": 0},
             ui_selection="multiple",
         )
+        # Rows are paginated on the server: the table only holds the rows and
+        # components of the current page, row data is kept in columns below.
+        self.on("request", self.request_page)
         self.shapes = []
-        self.selected = []
+        self.names = []
+        self.lower_names = []
+        self._last_search = None
+        self.maxhs = array("d")
+        self.view = range(0)
+        self._view_positions = None
+        self.page = 1
+        self.selected = set()
+        self.hidden = set()
+        self._drawn_selected = set()
+        self._drawn_hidden = set()
         self.row_components = {}
         self.ui_slot_body = self.create_row
         self.ui_slot_header = [
@@ -238,7 +475,15 @@ class ShapeTable(QTable):
             )
         ]
         self.search_input = QInput(
-            ui_name="Search", ui_dense=True, ui_debounce=500
+            QTooltip(
+                Div(
+                    "Search names by substring, glob (inlet_*) or regular expression (re:^in|out$). A number or range (face 100-200) selects by index. Rules: area < 0.5 (also length, volume), normal +z or normal 1,0,0 for flat faces, adjacent 2,3 for entities of or next to solids 2 and 3, small for features below the small feature size.",
+                    ui_style="max-width:300px;",
+                )
+            ),
+            ui_name="Search",
+            ui_dense=True,
+            ui_debounce=500,
         ).on_update_model_value(self.search)
         self.search_input.ui_slot_append = [QIcon(ui_name="search")]
         self.ui_slot_top_right = [
@@ -247,51 +492,227 @@ class ShapeTable(QTable):
         ]
         self.last_clicked = None
         self.geo_webgui = geo_webgui
+        self.colors = colors if colors is not None else GeometryColors(geo_webgui)
         self.shape_type = shape_type
-        self._loaded_rows = []
+        self._saved = None
+        self.geometry_key = None
+        self._imported_names = []
+        self._imported_maxhs = array("d")
         self.select_row_callback = []
+        self.maxh_callback = []
+        # detects the small features on the first search for them
+        self.small_callback = []
         self.name_inputs = {}
         self.maxh_inputs = {}
         self.visible_cbs = {}
-        self.faces = {}
-        self.edges = {}
+        self.topology = None
+        # features below the small feature size, None until detected
+        self.small = None
+        self.solid_faces = []
+        self.face_solids = []
+
+    def row(self, index):
+        maxh = self.maxhs[index]
+        return {
+            "index": index,
+            "name": self.names[index],
+            "maxh": None if maxh > 1e98 else maxh,
+            "visible": index not in self.hidden,
+        }
 
-    def search(self, event):
-        if event["value"] == "":
-            self.ui_rows = self.all_rows
+    @property
+    def rows_per_page(self):
+        return self.ui_pagination["rowsPerPage"]
+
+    def show_page(self, page):
+        rows_per_page = self.rows_per_page
+        n_pages = max(1, -(-len(self.view) // rows_per_page))
+        self.page = min(max(page, 1), n_pages)
+        start = (self.page - 1) * rows_per_page
+        indices = self.view[start : start + rows_per_page]
+        # release components of rows that are no longer shown
+        keep = set(indices)
+        for components in (
+            self.name_inputs,
+            self.maxh_inputs,
+            self.visible_cbs,
+            self.row_components,
+        ):
+            for index in [i for i in components if i not in keep]:
+                del components[index]
+        self.ui_pagination = {
+            "page": self.page,
+            "rowsPerPage": rows_per_page,
+            "rowsNumber": len(self.view),
+        }
+        self.ui_rows = [self.row(i) for i in indices]
+
+    def request_page(self, event):
+        pagination = event["value"]["pagination"]
+        if pagination.get("rowsPerPage"):
+            self.ui_pagination = self.ui_pagination | {
+                "rowsPerPage": pagination["rowsPerPage"]
+            }
+        self.show_page(pagination.get("page", 1))
+
+    def refresh_page(self):
+        self.show_page(self.page)
+
+    def set_view(self, view):
+        self.view = view
+        self._view_positions = None
+        self.show_page(1)
+
+    def view_position(self, index):
+        if isinstance(self.view, range):
+            return self.view.index(index) if index in self.view else None
+        if self._view_positions is None:
+            self._view_positions = {i: pos for pos, i in enumerate(self.view)}
+        return self._view_positions.get(index)
+
+    def show_row(self, index):
+        position = self.view_position(index)
+        if position is None:
+            # picked row is filtered out by the search, show all rows again
+            self.search_input.ui_model_value = ""
+            self.view = range(len(self.shapes))
+            self._view_positions = None
+            position = index
+        self.show_page(position // self.rows_per_page + 1)
 
+    def search(self, event):
+        text = (event["value"] or "").strip()
+        query = text.lower()
+        if query == "":
+            self._last_search = None
+            self.set_view(range(len(self.shapes)))
+            return
+        match = _index_query.match(query)
+        if match:
+            first = int(match.group(1))
+            last = int(match.group(2)) if match.group(2) else first
+            self._last_search = None
+            self.set_view(range(first, min(last, len(self.shapes) - 1) + 1))
+            return
+        matches = self.rule_matches(query)
+        if matches is not None:
+            self._last_search = None
+            self.set_view(matches)
+            return
+        if query.startswith("re:") or (
+            len(query) > 1 and query[0] == "/" and query[-1] == "/"
+        ):
+            # the pattern keeps its case, escapes like \D differ from \d
+            pattern = text[3:] if query.startswith("re:") else text[1:-1]
+            try:
+                regex = re.compile(pattern, re.IGNORECASE)
+            except re.error:
+                regex = None
+            names, matches = self.names, regex and regex.search
+        elif any(c in query for c in "*?["):
+            # globs match the whole name
+            regex = re.compile(fnmatch.translate(query))
+            names, matches = self.lower_names, regex.match
         else:
-            self.ui_rows = [
-                row
-                for row in self.all_rows
-                if (
-                    row["name"] is not None
-                    and event["value"].lower() in row["name"].lower()
-                )
+            # typing a longer query only narrows down the previous result
+            if self._last_search is not None and self._last_search[0] in query:
+                candidates = self._last_search[1]
+            else:
+                candidates = range(len(self.shapes))
+            names = self.lower_names
+            result = [
+                i for i in candidates if names[i] is not None and query in names[i]
             ]
+            self._last_search = (query, result)
+            self.set_view(result)
+            return
+        self._last_search = None
+        if matches is None:
+            self.set_view([])
+            return
+        self.set_view(
+            [i for i, name in enumerate(names) if name is not None and matches(name)]
+        )
+
+    def rule_matches(self, query):
+        # indices matching a selection rule, None if query is not a rule
+        topology = self.topology
+        if topology is None:
+            return None
+        if query == "small":
+            if self.small is None:
+                for cb in self.small_callback:
+                    cb()
+            return list(self.small or [])
+        try:
+            match = _measure_query.match(query)
+            if match:
+                op, value = match.group(1), float(match.group(2))
+                measures = topology.measures(self.shape_type)
+                mask = {
+                    "<": measures < value,
+                    "<=": measures <= value,
+                    ">": measures > value,
+                    ">=": measures >= value,
+                }[op]
+                return np.flatnonzero(mask).tolist()
+            match = _normal_query.match(query)
+            if match:
+                if self.shape_type != "faces":
+                    return []
+                if match.group(2):
+                    direction = np.zeros(3)
+                    direction["xyz".index(match.group(2))] = (
+                        -1 if match.group(1) == "-" else 1
+                    )
+                else:
+                    direction = np.array([float(v) for v in match.group(3, 4, 5)])
+                    direction /= np.linalg.norm(direction)
+                # the mean normal is shorter than 1 for curved faces, so these
+                # only match if they are flat within the tolerance
+                cos = topology.face_normals @ direction
+                return np.flatnonzero(
+                    cos >= np.cos(np.radians(normal_tolerance))
+                ).tolist()
+        except ValueError:
+            return []
+        match = _adjacent_query.match(query)
+        if match:
+            solids = [int(i) for i in re.split(r"[\s,]+", match.group(1))]
+            solids = [i for i in solids if i < len(topology.solids)]
+            if self.shape_type == "solids":
+                result = {j for i in solids for j in topology.solid_neighbours[i]}
+            else:
+                result = {face for i in solids for face in topology.solid_faces[i]}
+                if self.shape_type == "edges":
+                    face_edges = topology.face_edges
+                    result = {edge for face in result for edge in face_edges[face]}
+            return sorted(result)
+        return None
+
+    def select(self, indices):
+        self.selected = set(indices)
+        self.color_rows()
+        for cb in self.select_row_callback:
+            cb()
 
     def select_all(self):
-        self.selected = list(range(len(self.ui_rows)))
+        self.selected = set(self.view)
         self.color_rows()
 
     def click_row(self, event):
         row_index = event["arg"]["row"]
         if "ctrlKey" in event and event["ctrlKey"]:
-            sel = self.selected
-            if row_index in self.selected:
-                sel.remove(row_index)
-            else:
-                sel.append(row_index)
-            self.selected = sel
+            self.selected ^= {row_index}
         elif "shiftKey" in event and event["shiftKey"]:
             if self.last_clicked is not None:
                 start = min(row_index, self.last_clicked)
                 end = max(row_index, self.last_clicked)
-                self.selected = list(range(start, end + 1))
+                self.selected = set(range(start, end + 1))
             else:
-                self.selected = [row_index]
+                self.selected = {row_index}
         else:
-            self.selected = [row_index]
+            self.selected = {row_index}
         self.last_clicked = row_index
         self.color_rows()
         for cb in self.select_row_callback:
@@ -307,122 +728,232 @@ class ShapeTable(QTable):
         self.update_gui()
 
     def update_gui(self):
+        # Only entities whose selection or visibility changed since the last
+        # push are recoloured, unless another table painted the viewer since.
+        # Tables are painted once the geometry is drawn.
+        with self.colors.lock:
+            if not self.colors.drawn:
+                return
+            if self.colors.owner is not self:
+                self.colors.owner = self
+                self.repaint()
+            else:
+                changed = (self.selected ^ self._drawn_selected) | (
+                    self.hidden ^ self._drawn_hidden
+                )
+                if changed:
+                    self.paint(changed)
+            self._drawn_selected = set(self.selected)
+            self._drawn_hidden = set(self.hidden)
+
+    def color(self, index):
+        if index in self.hidden:
+            return self.colors.hidden_color
+        if index in self.selected:
+            return self.colors.selected_color
+        if self.shape_type == "edges":
+            return self.colors.edge_color
+        return self.colors.face_color
+
+    def solid_face_color(self, face):
+        solids = self.face_solids[face]
+        if all(solid in self.hidden for solid in solids):
+            return self.colors.hidden_color
+        if any(solid in self.selected for solid in solids):
+            return self.colors.selected_color
+        return self.colors.face_color
+
+    def paint(self, indices):
         if self.shape_type == "solids":
-            self.geo_webgui._webgui_data["edge_colors"] = [
-                (0, 0, 0, v[3] if len(v) == 4 else 1)
-                for v in self.geo_webgui._webgui_data["edge_colors"]
-            ]
-            drawn_faces = set()
-            self.geo_webgui._webgui_data["colors"] = [
-                (0.7, 0.7, 0.7, 1) for _ in self.geo_webgui._webgui_data["colors"]
-            ]
-            for index, shape in enumerate(self.shapes):
-                if self.ui_rows[index]["visible"]:
-                    for face in shape.faces:
-                        drawn_faces.add(self.face_index[face])
-                if index in self.selected:
-                    for face in shape.faces:
-                        self.geo_webgui._webgui_data["colors"][
-                            self.face_index[face]
-                        ] = (1, 0, 0, 1)
-            for index in range(len(self.geo_webgui._webgui_data["colors"])):
-                if index not in drawn_faces:
-                    self.geo_webgui._webgui_data["colors"][index] = (1, 1, 1, 0)
+            faces = set()
+            for index in indices:
+                faces.update(self.solid_faces[index])
+            self.colors.set(faces={f: self.solid_face_color(f) for f in faces})
         elif self.shape_type == "faces":
-            self.geo_webgui._webgui_data["edge_colors"] = [
-                (0, 0, 0, v[3] if len(v) == 4 else 1)
-                for v in self.geo_webgui._webgui_data["edge_colors"]
-            ]
-            for index, shape in enumerate(self.shapes):
-                if not self.ui_rows[index]["visible"]:
-                    self.geo_webgui._webgui_data["colors"][index] = (1, 1, 1, 0)
-                    continue
-                if index in self.selected:
-                    self.geo_webgui._webgui_data["colors"][index] = (1, 0, 0, 1)
-                else:
-                    self.geo_webgui._webgui_data["colors"][index] = (0.7, 0.7, 0.7, 1)
+            self.colors.set(faces={i: self.color(i) for i in indices})
         else:
-            self.geo_webgui._webgui_data["colors"] = [
-                (0.7, 0.7, 0.7, v[3]) for v in self.geo_webgui._webgui_data["colors"]
-            ]
-            for index, shape in enumerate(self.shapes):
-                if not self.ui_rows[index]["visible"]:
-                    self.geo_webgui._webgui_data["edge_colors"][index] = (1, 1, 1, 0)
-                    continue
-                if index in self.selected:
-                    self.geo_webgui._webgui_data["edge_colors"][index] = (1, 0, 0, 1)
-                else:
-                    self.geo_webgui._webgui_data["edge_colors"][index] = (0, 0, 0, 1)
+            self.colors.set(edges={i: self.color(i) for i in indices})
 
-        if self.faces == {}:
-            self.faces = {
-                i: color
-                for i, color in enumerate(self.geo_webgui._webgui_data["colors"])
-            }
-        if self.edges == {}:
-            self.edges = {
-                i: color
-                for i, color in enumerate(self.geo_webgui._webgui_data["edge_colors"])
+    def repaint(self):
+        # faces by the index of their row, shared faces of glued geometries by
+        # their last row like in Topology.face_index
+        if self.topology is not None:
+            face_rows = self.topology.viewer_faces
+        else:
+            face_rows = range(len(self.colors.faces))
+        if self.shape_type == "edges":
+            faces = {
+                i: (0.7, 0.7, 0.7, c[3]) for i, c in zip(face_rows, self.colors.faces)
             }
-
-        faces = {
-            i: (0.7, 0.7, 0.7, 1)
-            for i in range(len(self.geo_webgui._webgui_data["colors"]))
-        }
-        edges = {
-            i: (0, 0, 0, 1)
-            for i in range(len(self.geo_webgui._webgui_data["edge_colors"]))
-        }
-        faces.update(self.faces)
-        edges.update(self.edges)
-
-        def diff_dicts(dict1, webgui_data, type="faces"):
-            target_value = (0.7, 0.7, 0.7, 1) if type == "faces" else (0, 0, 0, 1)
-            dict2 = {i: data for i, data in enumerate(webgui_data)}
-            return {
-                key: value
-                for key, value in dict2.items()
-                if dict1[key] != value or dict1[key] != target_value
+            edges = {i: self.color(i) for i in range(len(self.colors.edges))}
+        else:
+            edges = {
+                i: (0, 0, 0, c[3] if len(c) == 4 else 1)
+                for i, c in enumerate(self.colors.edges)
             }
-
-        if diff := diff_dicts(faces, self.geo_webgui._webgui_data["colors"], "faces"):
-            self.faces = diff
-        if diff := diff_dicts(
-            edges, self.geo_webgui._webgui_data["edge_colors"], "edges"
-        ):
-            self.edges = diff
-        self.geo_webgui.set_color(faces=self.faces, edges=self.edges)
+            if self.shape_type == "solids":
+                faces = {i: self.solid_face_color(i) for i in face_rows}
+            else:
+                faces = {i: self.color(i) for i in face_rows}
+        self.colors.set(faces=faces, edges=edges)
 
     def dump(self):
-        return {"base": super().dump(), "rows": self.ui_rows}
+        # Only entries that differ from the imported geometry are stored, as
+        # index and value lists. Version 1 stored every row as a dict.
+        names, maxhs = self.names, self.maxhs
+        name_index = [
+            i for i, name in enumerate(self._imported_names) if names[i] != name
+        ]
+        maxh_index = [
+            i for i, maxh in enumerate(self._imported_maxhs) if maxhs[i] != maxh
+        ]
+        return {
+            "base": super().dump(),
+            "version": 2,
+            "geometry": self.geometry_key,
+            "count": len(self.shapes),
+            "name_index": name_index,
+            "name": [names[i] for i in name_index],
+            "maxh_index": maxh_index,
+            "maxh": [None if maxhs[i] > 1e98 else maxhs[i] for i in maxh_index],
+            "hidden": sorted(self.hidden),
+        }
 
     def load(self, data):
         if "base" in data and data["base"] is not None:
             super().load(data["base"])
+        if "rows" in data or "version" in data:
+            self._saved = data
+
+    def apply_saved(self, data):
         if "rows" in data:
-            self._loaded_rows = data["rows"]
+            rows = data["rows"]
+            count = len(rows)
+            name_index = maxh_index = range(count)
+            names = [row.get("name") for row in rows]
+            maxhs = [row.get("maxh") for row in rows]
+            hidden = []
+        else:
+            count = data.get("count")
+            name_index, names = data.get("name_index", []), data.get("name", [])
+            maxh_index, maxhs = data.get("maxh_index", []), data.get("maxh", [])
+            hidden = data.get("hidden", [])
+        if count != len(self.shapes) or (
+            data.get("geometry") is not None
+            and self.geometry_key is not None
+            and data["geometry"] != self.geometry_key
+        ):
+            logger.warning(
+                f"Saved {self.shape_type} settings do not match the geometry, ignored"
+            )
+            return
+        shapes = self.shapes
+        for index, name in zip(name_index, names):
+            shapes[index].name = name
+            self.names[index] = name
+            self.lower_names[index] = name.lower() if name else None
+        for index, maxh in zip(maxh_index, maxhs):
+            maxh = 1e99 if maxh is None or maxh == "" else float(maxh)
+            shapes[index].maxh = maxh
+            self.maxhs[index] = maxh
+        self.hidden = set(hidden)
+        self._last_search = None
+
+    def imported_overrides(self):
+        # names and maxh as they came with the geometry file
+        return [
+            [index, name, maxh if maxh < 1e98 else None]
+            for index, (name, maxh) in enumerate(
+                zip(self._imported_names, self._imported_maxhs)
+            )
+            if name is not None or maxh < 1e98
+        ]
+
+    def overrides(self):
+        overrides = []
+        for index, (name, maxh) in enumerate(zip(self.names, self.maxhs)):
+            if name is not None or maxh < 1e98:
+                overrides.append([index, name, maxh if maxh < 1e98 else None])
+        return overrides
+
+    def _update_page_row(self, index, key, value):
+        for row in self.ui_rows:
+            if row["index"] == index:
+                row[key] = value
+
+    def set_names(self, indices, name):
+        # one refresh of the page for any number of entities
+        name = name if name else None
+        lower = name.lower() if name else None
+        shapes, names, lower_names = self.shapes, self.names, self.lower_names
+        for index in indices:
+            shapes[index].name = name
+            names[index] = name
+            lower_names[index] = lower
+        self._last_search = None
+        for index in set(indices) & self.name_inputs.keys():
+            self.name_inputs[index].ui_model_value = name
+        self.refresh_page()
+
+    def set_maxhs(self, indices, maxh):
+        maxh = 1e99 if maxh is None or maxh == "" else float(maxh)
+        shapes, maxhs = self.shapes, self.maxhs
+        for index in indices:
+            shapes[index].maxh = maxh
+            maxhs[index] = maxh
+        for index in set(indices) & self.maxh_inputs.keys():
+            self.maxh_inputs[index].ui_model_value = None if maxh > 1e98 else maxh
+        self.refresh_page()
+        for cb in self.maxh_callback:
+            cb()
+
+    def set_visibility(self, indices, visible):
+        if visible:
+            self.hidden.difference_update(indices)
+        else:
+            self.hidden.update(indices)
+        for index in set(indices) & self.visible_cbs.keys():
+            self.visible_cbs[index].ui_model_value = visible
+        self.refresh_page()
+        self.update_gui()
 
     def set_name(self, data):
-        self.shapes[data["arg"]["row"]].name = data["value"]
-        self.ui_rows[data["arg"]["row"]]["name"] = data["value"]
+        index = data["arg"]["row"]
+        self.shapes[index].name = data["value"]
+        self.names[index] = data["value"]
+        self.lower_names[index] = data["value"].lower() if data["value"] else None
+        self._last_search = None
+        self._update_page_row(index, "name", data["value"])
         if "update_inputs" in data and data["update_inputs"]:
-            self.name_inputs[data["arg"]["row"]].ui_model_value = data["value"]
+            if index in self.name_inputs:
+                self.name_inputs[index].ui_model_value = data["value"]
 
     def set_maxh(self, data):
+        index = data["arg"]["row"]
         maxh = (
             1e99
             if (data["value"] is None or data["value"] == "")
             else float(data["value"])
         )
-        self.shapes[data["arg"]["row"]].maxh = maxh
-        self.ui_rows[data["arg"]["row"]]["maxh"] = maxh
+        self.shapes[index].maxh = maxh
+        self.maxhs[index] = maxh
+        self._update_page_row(index, "maxh", None if maxh > 1e98 else maxh)
         if "update_inputs" in data and data["update_inputs"]:
-            self.maxh_inputs[data["arg"]["row"]].ui_model_value = data["value"]
+            if index in self.maxh_inputs:
+                self.maxh_inputs[index].ui_model_value = data["value"]
+        for cb in self.maxh_callback:
+            cb()
 
     def set_visible(self, data):
-        self.ui_rows[data["arg"]["row"]]["visible"] = data["value"]
+        index = data["arg"]["row"]
+        if data["value"]:
+            self.hidden.discard(index)
+        else:
+            self.hidden.add(index)
+        self._update_page_row(index, "visible", data["value"])
         if "update_inputs" in data and data["update_inputs"]:
-            self.visible_cbs[data["arg"]["row"]].ui_model_value = data["value"]
+            if index in self.visible_cbs:
+                self.visible_cbs[index].ui_model_value = data["value"]
         self.update_gui()
 
     def create_row(self, props):
@@ -449,30 +980,60 @@ class ShapeTable(QTable):
             QTd(name_input),
             QTd(maxh_input),
             QTd(visible_cb),
+            ui_style=(
+                "background-color: #f0f0f0;" if row["index"] in self.selected else ""
+            ),
         ).on("click", self.click_row, arg={"row": row["index"]})
         self.row_components[row["index"]] = row_comp
         return [row_comp]
 
-    def set_shapes(self, shapes, face_index=None):
+    def set_shapes(self, shapes, topology=None, geometry_key=None):
         self.shapes = shapes
-        self.face_index = face_index
-        rows = []
-        for i, shape in enumerate(shapes):
-            rows.append(
-                {
-                    "index": i,
-                    "name": shape.name if shape.name else None,
-                    "maxh": None if shape.maxh > 1e98 else shape.maxh,
-                    "visible": True,
-                }
-            )
-        self.ui_rows = rows
-        self.all_rows = rows
-        if self._loaded_rows:
-            for i, r in enumerate(self._loaded_rows):
-                # use the callback structure
-                self.set_name({"value": r["name"], "arg": {"row": i}})
-                self.set_maxh({"value": r["maxh"], "arg": {"row": i}})
+        self.topology = topology
+        self.geometry_key = geometry_key
+        self.selected = set()
+        self.hidden = set()
+        if topology is not None and self.shape_type == "solids":
+            self.solid_faces = topology.solid_faces
+            self.face_solids = topology.face_solids
+        self.names = [shape.name if shape.name else None for shape in shapes]
+        self.lower_names = [name.lower() if name else None for name in self.names]
+        self._last_search = None
+        self.maxhs = array("d", (shape.maxh for shape in shapes))
+        self._imported_names = list(self.names)
+        self._imported_maxhs = array("d", self.maxhs)
+        if self._saved is not None:
+            self.apply_saved(self._saved)
+            self._saved = None
+        self.set_view(range(len(shapes)))
+
+
+def histogram_chart(title, counts, edges, is_bad=None):
+    # bar chart of a histogram, bins whose centre is_bad are red
+    top = max(counts.max(initial=0), 1)
+    bars = [
+        Div(
+            ui_style=f"flex:1;margin-right:1px;height:{100 * count / top:.1f}%;"
+            + f"min-height:{1 if count else 0}px;background-color:"
+            + ("#d32f2f" if is_bad and is_bad((lower + upper) / 2) else "#1976d2")
+            + ";"
+        )
+        for count, lower, upper in zip(counts, edges[:-1], edges[1:])
+    ]
+    return Div(
+        Div(title, ui_class="q-field__label"),
+        Div(
+            *bars,
+            ui_style="display:flex;align-items:flex-end;height:50px;"
+            + "border-bottom:1px solid #999;",
+        ),
+        Div(
+            Div(f"{edges[0]:.3g}"),
+            Div(f"{edges[-1]:.3g}"),
+            ui_style="display:flex;justify-content:space-between;font-size:smaller;",
+        ),
+        ui_style="margin-top:10px;width:250px;",
+    )
 
 
 class MainLayout(Div):
@@ -480,6 +1041,8 @@ class MainLayout(Div):
         self.alert_dialog = QDialog(Heading("Error"), "")
         super().__init__(self.alert_dialog, *args, id="main")
         self.shape = None
+        self.topology = None
+        self.mesh = None
         self.ui_hidden = True
         # Webgui needs to be wrapped in div so that hide/show works properly?
         self.webgui = WebguiComponent(id="webgui_geo")
@@ -505,6 +1068,9 @@ class MainLayout(Div):
                 self.webgui.update_camera_settings(geo_to_mesh)
             self.webgui_div.ui_hidden = self.gui_toggle.ui_model_value != "geo"
             self.mesh_webgui_div.ui_hidden = self.gui_toggle.ui_model_value != "mesh"
+            self.mesh_view.ui_hidden = (
+                self.mesh is None or self.gui_toggle.ui_model_value != "mesh"
+            )
 
         self.gui_toggle = QBtnToggle(
             ui_push=True,
@@ -515,6 +1081,23 @@ class MainLayout(Div):
             ],
             ui_style="margin-top:40px;",
         ).on_update_model_value(update_gui)
+        self.mesh_view = QSelect(
+            QTooltip(
+                Div(
+                    "Large meshes are shown by their boundary only, the volume elements are sent to the viewer when selected here. Bad elements shows the elements failing the quality limits in red.",
+                    ui_style="max-width:300px;",
+                )
+            ),
+            ui_label="Show",
+            ui_model_value="volume",
+            ui_options=[],
+            ui_emit_value=True,
+            ui_map_options=True,
+            ui_dense=True,
+            ui_style="min-width:200px;",
+        )
+        self.mesh_view.ui_hidden = True
+        self.mesh_view.on_update_model_value(self.draw_mesh)
 
         def click_webgui(args):
             dim = args["value"]["dim"]
@@ -522,36 +1105,84 @@ class MainLayout(Div):
                 return
             if dim == -1:
                 table = self.shapetype_tables[self.shapetype_selector.ui_model_value]
-                table.selected = []
+                table.selected = set()
                 table.color_rows()
                 return
                 # table.update_selected(table.selected)
             if dim == 2:
                 index = args["value"]["index"]
+                if self.topology is not None:
+                    index = self.topology.viewer_faces[index]
                 self.shapetype_selector.ui_model_value = "faces"
                 self.update_table_visiblity()
-                # TODO: Find a good way to go to the correct page
-                self.face_table.ui_firstPage()
-                for _ in range(index//self.face_table.ui_pagination["rowsPerPage"]):
-                    self.face_table.ui_nextPage()
+                self.face_table.show_row(index)
                 self.face_table.click_row(args["value"] | {"arg": {"row": index}})
             if dim == 1:
                 index = args["value"]["index"]
                 self.shapetype_selector.ui_model_value = "edges"
                 self.update_table_visiblity()
-                # TODO: Find a good way to go to the correct page
-                self.edge_table.ui_firstPage()
-                for _ in range(index//self.edge_table.ui_pagination["rowsPerPage"]):
-                    self.edge_table.ui_nextPage()
+                self.edge_table.show_row(index)
                 self.edge_table.click_row(args["value"] | {"arg": {"row": index}})
 
         self.webgui.on_click(click_webgui)
         self.geo_info = Div(ui_style="padding-left:5px;")
+        self.estimate_info = Div(ui_style="padding-left:5px;")
+        self.mesh_info = Div(ui_style="padding-left:5px;")
+        self.timings = JobTimings()
+        self.timing_info = Div(ui_style="padding-left:5px;font-size:smaller;")
+        self.quality = None
+        self.quality_info = Div()
+        self.quality_card = QCard(
+            Heading("Mesh Quality", 3),
+            self.quality_info,
+            ui_style="margin:10px;padding:30px;",
+        )
+        self.quality_card.ui_hidden = True
+        self.loading_message = Div("Generating Mesh...")
+        self.loading_progress = QLinearProgress(
+            ui_value=0, ui_color="primary", ui_style="width:300px;margin:10px;"
+        )
+        self.cancel_mesh_button = QBtn(
+            "Cancel", ui_flat=True, ui_color="negative"
+        ).on_click(self.cancel_mesh)
+        # Only covers the viewer, tables and settings stay usable while meshing
+        self.loading = QInnerLoading(
+            QSpinnerGears(ui_size="100px", ui_color="primary"),
+            Centered(self.loading_message),
+            Centered(self.loading_progress),
+            Centered(self.cancel_mesh_button),
+            ui_showing=True,
+            ui_style="z-index:100;"
+        )
+        self.loading.ui_hidden = True
+        self.mesh_job = None
+        self._session = next(_sessions)
+        self._geometry_draw = None
+        self.geometry_key = None
+        # tolerance and source artifacts of a healed geometry
+        self._heal = None
+        self._mesh_artifact = None
+        # stores the mesh artifact of the current mesh
+        self._artifact_thread = None
+        self._saved_artifacts = None
+        self._workdir = tempfile.mkdtemp(prefix="meshing_app_")
+        weakref.finalize(self, shutil.rmtree, self._workdir, True)
+        self._brep_file = None
+        self.mesh_file = None
+        self._downloads = {}
+        # files of earlier meshes, the oldest first
+        self._old_downloads = []
+        self._geometry_hash = None
         webgui_card = QCard(
             Centered(self.gui_toggle),
             self.webgui_div,
             self.mesh_webgui_div,
+            Centered(self.mesh_view),
             self.geo_info,
+            self.estimate_info,
+            self.mesh_info,
+            self.timing_info,
+            self.loading,
             ui_style="margin:10px; fit;width:700px;height:800px;",
         )
         self.shapetype_selector = QBtnToggle(
@@ -565,16 +1196,17 @@ class MainLayout(Div):
             ui_style="margin-bottom:10px;",
         )
         self.shapetype_selector.on_update_model_value(self.update_table_visiblity)
-        self.solid_table = ShapeTable(self.webgui, "solids")
+        self.geo_colors = GeometryColors(self.webgui)
+        self.solid_table = ShapeTable(self.webgui, "solids", self.geo_colors)
         self.solid_table.ui_hidden = True
-        self.face_table = ShapeTable(self.webgui, "faces")
+        self.face_table = ShapeTable(self.webgui, "faces", self.geo_colors)
 
         def create_body_cell(props):
             return [QTd(QInput(ui_label=props["col"]["label"]))]
 
         self.face_table.ui_slot_body_cell_name("name", create_body_cell)
 
-        self.edge_table = ShapeTable(self.webgui, "edges")
+        self.edge_table = ShapeTable(self.webgui, "edges", self.geo_colors)
         self.edge_table.ui_hidden = True
         self.shapetype_tables = {
             "solids": self.solid_table,
@@ -583,31 +1215,16 @@ class MainLayout(Div):
         }
 
         def set_selected_name():
-            name = self.change_name.ui_model_value
             table = self.shapetype_tables[self.shapetype_selector.ui_model_value]
-            for index in table.selected:
-                table.set_name(
-                    {"value": name, "arg": {"row": index}, "update_inputs": True}
-                )
-            table.ui_rows = table.ui_rows  # trigger update
-            table.update_gui()
+            table.set_names(table.selected, self.change_name.ui_model_value)
 
         def set_selected_maxh():
-            maxh = self.change_maxh.ui_model_value
             table = self.shapetype_tables[self.shapetype_selector.ui_model_value]
-            for index in table.selected:
-                table.set_maxh(
-                    {"value": maxh, "arg": {"row": index}, "update_inputs": True}
-                )
-            table.update_gui()
+            table.set_maxhs(table.selected, self.change_maxh.ui_model_value)
 
         def set_selected_visible():
-            visible = self.change_visiblity.ui_model_value
             table = self.shapetype_tables[self.shapetype_selector.ui_model_value]
-            for index in table.selected:
-                table.set_visible(
-                    {"value": visible, "arg": {"row": index}, "update_inputs": True}
-                )
+            table.set_visibility(table.selected, self.change_visiblity.ui_model_value)
 
         def reset_change_for_all():
             self.change_name.ui_model_value = None
@@ -621,12 +1238,32 @@ class MainLayout(Div):
         ).on_update_model_value(set_selected_maxh)
         for table in self.shapetype_tables.values():
             table.select_row_callback.append(reset_change_for_all)
+            table.maxh_callback.append(self.update_estimate)
+            table.small_callback.append(self.detect_small_features)
 
         self.change_visiblity = QCheckbox(
             ui_label="Visible",
             ui_model_value=True,
         ).on_update_model_value(set_selected_visible)
 
+        self.heal_tolerance = NumberInput(
+            QTooltip(
+                Div(
+                    "Edges shorter, faces narrower and solids thinner than this are small features. Healing removes short edges and merges narrow faces and small fillets into their neighbours, names and maxh are kept where possible.",
+                    ui_style="max-width:300px;",
+                )
+            ),
+            ui_label="Small feature size",
+            ui_debounce=500,
+        ).on_update_model_value(self.detect_small_features)
+        self.detect_button = QBtn("Detect", ui_flat=True).on_click(
+            self.detect_small_features
+        )
+        self.heal_button = QBtn("Heal geometry", ui_flat=True).on_click(
+            self.heal_geometry
+        )
+        self.heal_info = Div(ui_style="padding-left:20px;")
+
         settings = QCard(
             Centered(self.shapetype_selector),
             self.solid_table,
@@ -638,10 +1275,17 @@ class MainLayout(Div):
                 self.change_maxh,
                 self.change_visiblity,
             ),
+            Row(
+                Heading("Small features:", 6, ui_style="margin:20px"),
+                self.heal_tolerance,
+                self.detect_button,
+                self.heal_button,
+            ),
+            self.heal_info,
             ui_style="margin:10px;padding:10px;",
         )
 
-        generate_mesh_button = QBtn(
+        self.generate_mesh_button = QBtn(
             QTooltip("Generate Mesh"),
             ui_fab=True,
             ui_icon="mdi-arrow-right-drop-circle-outline",
@@ -667,14 +1311,17 @@ class MainLayout(Div):
             ui_style="position: fixed; right: 80px; bottom: 20px;",
         )
         self.global_settings = GlobalMeshingSettings()
-        self.loading = QInnerLoading(
-            QSpinnerGears(ui_size="100px", ui_color="primary"),
-            Centered("Generating Mesh..."),
-            ui_showing=True,
-            ui_style="z-index:100;"
-        )
-
-        self.loading.ui_hidden = True
+        self.global_settings.export_format.on_update_model_value(self.update_download)
+        self.global_settings.compression.on_update_model_value(self.update_download)
+        for widget in (
+            self.global_settings.mesh_dimension,
+            self.global_settings.mesh_granularity,
+            self.global_settings.maxh,
+            self.global_settings.curvature_safety,
+            self.global_settings.segments_per_edge,
+            self.global_settings.grading,
+        ):
+            widget.on_update_model_value(self.update_estimate)
         self.save_button = QBtn(
             QTooltip("Save"),
             ui_fab=True,
@@ -685,45 +1332,430 @@ class MainLayout(Div):
 
         table_and_gui = QSplitter(ui_model_value=40)
         table_and_gui.ui_slot_before = [settings]
-        table_and_gui.ui_slot_after = [Row(webgui_card,self.global_settings)]
+        table_and_gui.ui_slot_after = [
+            Row(webgui_card, Div(self.global_settings, self.quality_card))
+        ]
 
         self.ui_children = [
             table_and_gui,
-            generate_mesh_button,
+            self.generate_mesh_button,
             self.download_mesh_button,
             self.back_to_start,
             self.save_button,
-            self.loading,
         ]
 
+    def estimate(self):
+        return estimate_mesh(
+            self.topology,
+            self.global_settings.get_meshing_parameters(),
+            {
+                shape_type: table.maxhs
+                for shape_type, table in self.shapetype_tables.items()
+            },
+            self.global_settings.mesh_dimension.ui_model_value,
+        )
+
+    def update_estimate(self):
+        if self.topology is None:
+            return
+        estimate = self.estimate()
+        children = [
+            f"Estimated mesh: ~{estimate['elements']:,} elements, "
+            f"~{estimate['seconds']:.0f}s, "
+            f"~{estimate['memory'] / 1024**2:.0f} MB"
+        ]
+        message = check_limits(estimate)
+        if message is not None:
+            children.append(Div(message, ui_style="color:red;"))
+        self.estimate_info.ui_children = children
+
     def generate_mesh(self):
-        import netgen
-        import netgen.occ as ngocc
+        if self.mesh_job is not None and self.mesh_job.running:
+            return
+        estimate = self.estimate()
+        message = check_limits(estimate)
+        if message is not None:
+            logger.warning("Mesh of %s over the limits: %s", self.name, message)
+            if limit_action == "refuse":
+                self.alert_dialog.ui_children[1] = (
+                    message + " Use a coarser mesh size to mesh this geometry."
+                )
+                self.alert_dialog.ui_show()
+                return
         self.mesh = None
-
-        self.loading.ui_label = "Generating Mesh..."
+        self.loading_message.ui_children = ["Generating Mesh..."]
+        self.loading_progress.ui_value = 0
         self.loading.ui_hidden = False
-        # ngocc.ResetGlobalShapeProperties()
-        geo = ngocc.OCCGeometry(self.shape,
-                                dim=self.global_settings.mesh_dimension.ui_model_value)
-        mp = self.global_settings.get_meshing_parameters()
+        self.generate_mesh_button.ui_disable = True
+        # a new file per run, the previous mesh may still be downloaded
+        fd, output = tempfile.mkstemp(dir=self._workdir, suffix=".vol")
+        os.close(fd)
+        dim = self.global_settings.mesh_dimension.ui_model_value
+        parameters = self.global_settings.get_meshing_parameters()
+        overrides = {
+            shape_type: table.overrides()
+            for shape_type, table in self.shapetype_tables.items()
+        }
+        parallel = bool(self.global_settings.parallel.ui_model_value)
+        key = mesh_key(self.get_geometry_hash(), parameters, dim, overrides, parallel)
+        cached = mesh_cache.get(key)
+        if cached is not None:
+            try:
+                shutil.copyfile(cached, output)
+            except OSError:
+                # evicted by another session in the meantime
+                cached = None
+        if cached is not None:
+            self.timings.counts["mesh_cache_hit"] = 1
+            for phase in ("load_brep", "generate_mesh", "mesh_save"):
+                self.timings.phases.pop(phase, None)
+            # no meshing job ran
+            self.timings.peak_rss = None
+            try:
+                self.show_mesh(output)
+                self.show_solid_timings({})
+            finally:
+                self.loading.ui_hidden = True
+                self.generate_mesh_button.ui_disable = False
+            return
+        self.timings.counts.pop("mesh_cache_hit", None)
+        # parallel jobs use a process per solid
+        cpus = len(self.topology.solids) if parallel and dim == 3 else 1
+        self.mesh_job = scheduler.submit(
+            MeshingJob(
+                brep_file=self.get_brep_file(),
+                dim=dim,
+                parameters=parameters,
+                overrides=overrides,
+                output=output,
+                parallel=parallel,
+            ),
+            session=self._session,
+            cpus=cpus,
+            memory=estimate["memory"],
+        )
+        threading.Thread(
+            target=self._watch_mesh_job,
+            args=(self.mesh_job, key),
+            daemon=True,
+        ).start()
+
+    def dump(self):
+        return {"base": super().dump(), "artifacts": self.case_artifacts()}
+
+    def load(self, data):
+        if "base" in data and data["base"] is not None:
+            super().load(data["base"])
+        self._saved_artifacts = data.get("artifacts")
+
+    def case_artifacts(self):
+        # The geometry (as imported, with its own names) and the last mesh
+        # are stored by content hash when they are created, so the case
+        # loads without importing and meshing again and cases with the same
+        # files share them.
+        if self.shape is None or self.geometry_key is None:
+            return None
+        artifacts = {"geometry": self.geometry_key}
+        if self._heal is not None:
+            # healed again from its source if the healed shape was evicted
+            artifacts["heal"] = self._heal
+        if self._artifact_thread is not None:
+            self._artifact_thread.join()
+        if self._mesh_artifact is not None:
+            artifacts["mesh"] = self._mesh_artifact
+        return artifacts
+
+    def store_geometry_artifact(self):
+        if self.geometry_key is None or case_geometries.has(self.geometry_key):
+            return
+        case_geometries.put(
+            self.geometry_key,
+            self.shape,
+            properties={
+                shape_type: table.imported_overrides()
+                for shape_type, table in self.shapetype_tables.items()
+            },
+        )
+
+    def _store_mesh_artifact(self, mesh_file):
         try:
-            mesh = geo.GenerateMesh(**mp)
-            # TODO: .vol.gz not working yet?
-            filename = self.name + ".vol"
-            mesh.Save(filename)
-            self.mesh = mesh
-            self.download_mesh_button.set_file(filename, file_location=filename)
-            self.gui_toggle.ui_model_value = "mesh"
-            self.webgui_div.ui_hidden = True
-            self.mesh_webgui_div.ui_hidden = False
-            self.mesh_webgui.draw(mesh, store=True)
-            self.webgui.clear()
-        except netgen.libngpy._meshing.NgException as e:
-            print("Error in meshing", e)
-            self.alert_dialog.ui_children[1] = str(e)
-            self.alert_dialog.ui_show()
-        self.loading.ui_hidden = True
+            key = hash_file(mesh_file)
+            if case_meshes.get(key) is None:
+                fd, compressed = tempfile.mkstemp(dir=self._workdir, suffix=".vol.gz")
+                os.close(fd)
+                try:
+                    case_meshes.put(key, compress_file(mesh_file, compressed, "gzip"))
+                finally:
+                    os.remove(compressed)
+        except OSError:
+            logger.exception("Storing the mesh of %s failed", self.name)
+            return
+        if self.mesh_file == mesh_file:
+            self._mesh_artifact = key
+
+    def saved_geometry(self, artifacts):
+        # shape of a saved case, a healed shape that was evicted is healed
+        # again from its source
+        key = artifacts["geometry"]
+        shape = geometry_cache.get(key) or case_geometries.get(key)
+        heal = artifacts.get("heal")
+        if shape is None and heal is not None:
+            source = self.saved_geometry(heal["source"])
+            if source is not None:
+                shape = self.healed_shape(source, heal["tolerance"], key)
+        return shape
+
+    def load_saved_mesh(self, artifacts):
+        key = artifacts.get("mesh")
+        if key is None:
+            return
+        compressed = case_meshes.get(key)
+        if compressed is None:
+            # a cache miss like any other, the case is meshed on request
+            self.timings.counts["mesh_artifact_miss"] = 1
+            logger.info("Saved mesh of %s was evicted from the cache", self.name)
+            return
+        fd, output = tempfile.mkstemp(dir=self._workdir, suffix=".vol")
+        with os.fdopen(fd, "wb") as fout, gzip.open(compressed, "rb") as fin:
+            shutil.copyfileobj(fin, fout, 1 << 20)
+        self.timings.peak_rss = None
+        self.show_mesh(output, artifact=key)
+
+    def get_brep_file(self):
+        if self._brep_file is None:
+            self._brep_file = os.path.join(self._workdir, "geometry.brep")
+            self.shape.WriteBrep(self._brep_file)
+        return self._brep_file
+
+    def get_geometry_hash(self):
+        if self._geometry_hash is None:
+            self._geometry_hash = hash_file(self.get_brep_file())
+        return self._geometry_hash
+
+    def cancel_mesh(self):
+        if self.mesh_job is not None:
+            self.mesh_job.cancel()
+
+    def _show_mesh_progress(self, stage, progress):
+        self.loading_message.ui_children = [
+            f"Generating Mesh... {stage}" if stage else "Generating Mesh..."
+        ]
+        self.loading_progress.ui_value = progress / 100
+
+    def _watch_mesh_job(self, job, key):
+        try:
+            state = job.wait(on_progress=self._show_mesh_progress)
+            if state == "done":
+                mesh_cache.put(key, job.output)
+            elif os.path.exists(job.output):
+                os.remove(job.output)
+            if job is self.mesh_job:
+                if state == "done":
+                    for phase, seconds in job.phases.items():
+                        self.timings.add(phase, seconds)
+                    self.timings.peak_rss = job.peak_rss
+                    self.show_mesh(job.output)
+                    self.show_solid_timings(job.solid_timings)
+                elif state == "failed":
+                    logger.error("Error in meshing %s: %s", self.name, job.error)
+                    self.alert_dialog.ui_children[1] = str(job.error)
+                    self.alert_dialog.ui_show()
+        except Exception:
+            logger.exception("Error in showing the mesh of %s", self.name)
+        finally:
+            # never leave the viewer covered and the button disabled
+            self.loading.ui_hidden = True
+            self.generate_mesh_button.ui_disable = False
+
+    def show_mesh(self, mesh_file, artifact=None):
+        # artifact is the key of a mesh loaded from a saved case
+        import netgen.meshing as ngmeshing
+
+        mesh = ngmeshing.Mesh()
+        with self.timings.phase("mesh_load"):
+            mesh.Load(mesh_file)
+        # 2D meshes count their surface elements
+        elements = mesh.ne or len(mesh.Elements2D())
+        self.timings.counts["elements"] = elements
+        self.timings.counts["vertices"] = len(mesh.Points())
+        self.mesh = mesh
+        if self.mesh_file is not None:
+            self._old_downloads.append(set(self._downloads.values()) | {self.mesh_file})
+        while len(self._old_downloads) > kept_meshes:
+            for download in self._old_downloads.pop(0):
+                if os.path.exists(download):
+                    os.remove(download)
+        self.mesh_file = mesh_file
+        self._mesh_artifact = artifact
+        if artifact is None:
+            self._artifact_thread = threading.Thread(
+                target=self._store_mesh_artifact, args=(mesh_file,), daemon=True
+            )
+            self._artifact_thread.start()
+        self._downloads = {}
+        self.update_download()
+        self.gui_toggle.ui_model_value = "mesh"
+        self.webgui_div.ui_hidden = True
+        self.mesh_webgui_div.ui_hidden = False
+        options = [
+            {"label": "Boundary", "value": "surface"},
+            {"label": "Volume mesh", "value": "volume"},
+        ]
+        regions = []
+        if mesh.dim == 3:
+            regions = sorted(set(mesh.GetRegionNames(dim=3)) - {""})
+        if len(regions) > 1:
+            options += [{"label": f"Region {name}", "value": name} for name in regions]
+        options.append({"label": "Bad elements", "value": "bad_elements"})
+        self.mesh_view.ui_options = options
+        self.mesh_view.ui_model_value = (
+            "surface" if elements > mesh_preview_min_elements else "volume"
+        )
+        self.mesh_view.ui_hidden = False
+        with self.timings.phase("mesh_webgui_draw"):
+            self.draw_mesh()
+        self.webgui.clear()
+        self.quality = None
+        self.quality_card.ui_hidden = True
+        threading.Thread(target=self._analyse_mesh, args=(mesh,), daemon=True).start()
+        self.timings.log("generate_mesh" if artifact is None else "load_mesh")
+        self.show_timings()
+
+    def _analyse_mesh(self, mesh):
+        with self.timings.phase("mesh_quality"):
+            quality = mesh_quality(mesh)
+        if self.mesh is not mesh:
+            return
+        self.quality = quality
+        self.show_quality()
+        self.show_timings()
+
+    def get_quality(self):
+        if self.quality is None:
+            self.quality = mesh_quality(self.mesh)
+        return self.quality
+
+    def show_quality(self, worst_count=10):
+        quality = self.quality
+        bad = bad_elements(quality)
+        kind, angle = (
+            ("tetrahedra", "dihedral angle")
+            if quality["dim"] == 3
+            else ("triangles", "angle")
+        )
+        summary = (
+            f"{len(bad):,} {kind}, {int(bad.sum()):,} bad (aspect ratio > "
+            f"{max_aspect_ratio:g}, {angle} < {min_angle:g}° or > {max_angle:g}°)"
+        )
+        if quality["skipped"]:
+            summary += f", {quality['skipped']:,} other elements not rated"
+        names = self.mesh.GetRegionNames(dim=quality["dim"])
+        worst = [
+            Div(
+                f"Element {quality['elements'][i]}"
+                + (
+                    f" ({names[quality['region'][i] - 1]})"
+                    if 0 < quality["region"][i] <= len(names)
+                    else ""
+                )
+                + f": aspect ratio {quality['aspect_ratio'][i]:.1f}, "
+                + f"{angle} {quality['min_angle'][i]:.1f}°-"
+                + f"{quality['max_angle'][i]:.1f}°, "
+                + f"{'volume' if quality['dim'] == 3 else 'area'} "
+                + f"{quality['volume'][i]:.3g}",
+                ui_style="font-size:smaller;",
+            )
+            for i in worst_elements(quality, worst_count)
+        ]
+        self.quality_info.ui_children = [
+            Div(summary),
+            histogram_chart(
+                "Aspect ratio",
+                *histogram(quality["aspect_ratio"], lower=1, upper=2 * max_aspect_ratio),
+                lambda x: x > max_aspect_ratio,
+            ),
+            histogram_chart(
+                f"Minimal {angle}",
+                *histogram(quality["min_angle"], lower=0, upper=90),
+                lambda x: x < min_angle,
+            ),
+            histogram_chart(
+                f"Maximal {angle}",
+                *histogram(quality["max_angle"], lower=60, upper=180),
+                lambda x: x > max_angle,
+            ),
+            histogram_chart(
+                "Volume" if quality["dim"] == 3 else "Area",
+                *histogram(quality["volume"], log=True),
+            ),
+            Heading("Worst elements", 6, ui_style="margin:10px 0 0 0;"),
+            *worst,
+        ]
+        self.quality_card.ui_hidden = False
+
+    def draw_mesh(self):
+        view = self.mesh_view.ui_model_value
+        if self.mesh is None:
+            return
+        if view == "surface":
+            self.mesh_webgui.draw(surface_mesh(self.mesh), store=True)
+        elif view == "volume":
+            self.mesh_webgui.draw(self.mesh, store=True)
+        elif view == "bad_elements":
+            quality = self.get_quality()
+            self.mesh_webgui.draw(
+                highlight_mesh(self.mesh, quality, bad_elements(quality)), store=True
+            )
+        else:
+            self.mesh_webgui.draw(region_mesh(self.mesh, view), store=True)
+
+    def show_timings(self):
+        self.timing_info.ui_children = [
+            Div(line) for line in self.timings.summary()
+        ]
+
+    def show_solid_timings(self, timings):
+        if not timings:
+            self.mesh_info.ui_children = []
+            return
+        slowest = sorted(timings.items(), key=lambda item: -item[1])[:5]
+        names = self.solid_table.names
+        self.mesh_info.ui_children = [
+            f"Volume meshing of {len(timings)} solids, slowest: "
+            + ", ".join(
+                f"{names[index] or index} ({seconds:.1f}s)"
+                for index, seconds in slowest
+            )
+        ]
+
+    def update_download(self):
+        if self.mesh_file is None:
+            return
+        fmt = self.global_settings.export_format.ui_model_value
+        compression = self.global_settings.compression.ui_model_value
+        extension = formats[fmt][1]
+        # each format/compression is only written once it is asked for
+        if (fmt, compression) not in self._downloads:
+            exported = self._downloads.get((fmt, "none")) or export_mesh(
+                self.mesh,
+                self.mesh_file,
+                fmt,
+                os.path.splitext(self.mesh_file)[0] + "." + fmt + extension,
+            )
+            if compression == "none":
+                self._downloads[(fmt, "none")] = exported
+            else:
+                self._downloads[(fmt, compression)] = compress_file(
+                    exported, exported + compressions[compression], compression
+                )
+                # the uncompressed export is only kept if it was asked for
+                if (fmt, "none") not in self._downloads and exported != self.mesh_file:
+                    os.remove(exported)
+        # the file is passed by location so it is sent from disk, not memory
+        self.download_mesh_button.set_file(
+            self.name + extension + compressions[compression],
+            file_location=self._downloads[(fmt, compression)],
+        )
 
     def update_table_visiblity(self):
         shape_type = self.shapetype_selector.ui_model_value
@@ -732,26 +1764,192 @@ class MainLayout(Div):
         self.edge_table.ui_hidden = shape_type != "edges"
         self.shapetype_tables[shape_type].update_gui()
 
-    def build_from_shape(self, shape, name):
+    def build_from_shape(self, shape, name, geometry_key=None):
+        with self.timings.phase("build_from_shape"):
+            self._build_from_shape(shape, name, geometry_key)
+        self.timings.log("build_from_shape")
+        self.show_timings()
+
+    def small_feature_size(self):
+        value = self.heal_tolerance.ui_model_value
+        if value is None or value == "" or float(value) <= 0:
+            return None
+        return float(value)
+
+    def detect_small_features(self):
+        tolerance = self.small_feature_size()
+        if self.topology is None or tolerance is None:
+            return
+        features = small_features(self.topology, tolerance)
+        for shape_type, table in self.shapetype_tables.items():
+            table.small = features[shape_type]
+        counts = [
+            f"{len(features[shape_type])} {shape_type}"
+            for shape_type in self.shapetype_tables
+            if features[shape_type]
+        ]
+        self.heal_button.ui_disable = not counts
+        self.heal_info.ui_children = [
+            f"Below {tolerance:g}: " + ", ".join(counts)
+            + ". Search 'small' in the tables to list them."
+            if counts
+            else f"No features below {tolerance:g}."
+        ]
+
+    def healed_shape(self, shape, tolerance, key, topology=None, properties=None):
+        # The healed shape gets the names and maxh of the geometry file, so it
+        # is the same for every session and when a saved case heals again. It
+        # is cached per input and tolerance.
+        healed = geometry_cache.get(key) if key else None
+        if healed is not None:
+            self.timings.counts["heal_cache_hit"] = 1
+            return healed
+        healed = heal_shape(shape, tolerance)
+        transfer_properties(topology or Topology(shape), healed, tolerance, properties)
+        if key:
+            geometry_cache.put(key, healed)
+        return healed
+
+    def heal_geometry(self):
+        tolerance = self.small_feature_size()
+        if self.shape is None or tolerance is None:
+            return
+        key = self.geometry_key and hash_json(
+            {"geometry": self.geometry_key, "heal": tolerance}
+        )
+        source = {"geometry": self.geometry_key}
+        if self._heal is not None:
+            source["heal"] = self._heal
+        original = self.topology
+        tables = self.shapetype_tables
+        imported = {
+            shape_type: (table._imported_names, table._imported_maxhs)
+            for shape_type, table in tables.items()
+        }
+        edited = {
+            shape_type: (list(table.names), list(table.maxhs))
+            for shape_type, table in tables.items()
+        }
+        with self.timings.phase("heal"):
+            shape = self.healed_shape(self.shape, tolerance, key, original, imported)
+        self.build_from_shape(shape, self.name, key)
+        if key:
+            self._heal = {"tolerance": tolerance, "source": source}
+        # names and maxh set in this session before healing, as edits
+        for shape_type, table in tables.items():
+            names, maxhs = edited[shape_type]
+            imported_names, imported_maxhs = imported[shape_type]
+            changed = [
+                i
+                for i in range(len(names))
+                if names[i] != imported_names[i] or maxhs[i] != imported_maxhs[i]
+            ]
+            if not changed:
+                continue
+            originals = getattr(original, shape_type)
+            index = matches([originals[i] for i in changed], table.shapes, tolerance)
+            new_names, new_maxhs = {}, {}
+            for j, i in enumerate(index.tolist()):
+                if i < 0:
+                    continue
+                i = changed[i]
+                if names[i] != imported_names[i]:
+                    new_names.setdefault(names[i], []).append(j)
+                if maxhs[i] != imported_maxhs[i]:
+                    new_maxhs.setdefault(maxhs[i], []).append(j)
+            for name, indices in new_names.items():
+                table.set_names(indices, name)
+            for maxh, indices in new_maxhs.items():
+                table.set_maxhs(indices, maxh)
+        self.heal_tolerance.ui_model_value = tolerance
+        self.detect_small_features()
+
+    def draw_geometry(self, geometry_key=None):
+        # Large geometries are drawn with their coarse preview first and the
+        # full tessellation from a background thread. Geometries with many
+        # faces that are not cached yet are tessellated in a background
+        # process from their BREP file, small ones here.
+        self._geometry_draw = token = object()
+        topology = self.topology
+        full, preview = tessellations(geometry_key)
+        if full is None and len(topology.faces) >= background_min_faces:
+            self.webgui.clear()
+            threading.Thread(
+                target=self._tessellate_geometry,
+                args=(token, topology, geometry_key, self.get_brep_file()),
+                daemon=True,
+            ).start()
+            return
+        if full is None:
+            shape = self.shape
+            full, preview = tessellations(geometry_key, lambda: tessellate(shape))
+        self._set_tessellation(topology, full, preview)
+        if preview is None:
+            self._draw_tessellation(token, full)
+            return
+        self._draw_tessellation(token, preview)
+        threading.Thread(
+            target=self._draw_tessellation, args=(token, full), daemon=True
+        ).start()
+
+    def _set_tessellation(self, topology, full, preview):
+        topology.tessellation = full
+        self.timings.counts["triangles"] = n_triangles(full)
+        if preview is not None:
+            self.timings.counts["preview_triangles"] = n_triangles(preview)
+
+    def _tessellate_geometry(self, token, topology, geometry_key, brep_file):
+        try:
+            full, preview = tessellations(
+                geometry_key, lambda: run_in_process(tessellate_brep, brep_file)
+            )
+        except Exception:
+            logger.exception("Tessellation of %s failed", self.name)
+            return
+        self._set_tessellation(topology, full, preview)
+        if preview is not None and not self._draw_tessellation(token, preview):
+            return
+        if self._draw_tessellation(token, full):
+            # flat faces are known from the tessellation only
+            self.update_estimate()
+
+    def _draw_tessellation(self, token, data):
+        # Data of a geometry that was replaced in the meantime is dropped.
+        # The tables repaint the new data, so colours set while it was sent
+        # are kept.
+        colors = self.geo_colors
+        with colors.lock:
+            if self._geometry_draw is not token:
+                return False
+            self.webgui.draw(Tessellation(data))
+            colors.owner = None
+            colors.drawn = True
+            self.shapetype_tables[self.shapetype_selector.ui_model_value].update_gui()
+        return True
+
+    def _build_from_shape(self, shape, name, geometry_key=None):
+        self.cancel_mesh()
         self.shape = shape
         self.name = name
+        self.geometry_key = geometry_key
+        self._heal = None
+        self._brep_file = None
+        self._geometry_hash = None
         bb = shape.bounding_box
         self.geo_info.ui_children = [
             "Boundingbox: "
             + f"({bb[0][0]:.2f},{bb[0][1]:.2f},{bb[0][2]:.2f}) - ({bb[1][0]:.2f},{bb[1][1]:.2f},{bb[1][2]:.2f})"
         ]
         size = sum((bb[1][i] - bb[0][i])**2 for i in range(3))**0.5
-        face_index = {}
-        for i, face in enumerate(self.shape.faces):
-            face_index[face] = i
-        self.shape.faces.col = (0.7, 0.7, 0.7)
-        self.webgui.draw(self.shape)
-        if len(self.shape.solids) == 0:
+        self.topology = topology = Topology(shape)
+        topology.faces.col = (0.7, 0.7, 0.7)
+        self.geo_colors.reset(topology.face_viewer_index)
+        if len(topology.solids) == 0:
             self.shapetype_selector.ui_options = [
                 {"label": "Faces", "value": "faces"},
                 {"label": "Edges", "value": "edges"},
             ]
-            if not any([abs(v.p[2]) > size * 1e-10 for v in self.shape.vertices]):
+            if topology.is_planar(size * 1e-10):
                 self.global_settings.mesh_dimension.ui_model_value = 2
                 self.global_settings.mesh_dimension.ui_disable = False
             else:
@@ -764,17 +1962,35 @@ class MainLayout(Div):
                 {"label": "Faces", "value": "faces"},
                 {"label": "Edges", "value": "edges"},
             ]
-        self.solid_table.set_shapes(self.shape.solids, face_index=face_index)
-        self.face_table.set_shapes(self.shape.faces)
-        self.edge_table.set_shapes(self.shape.edges)
+        self.solid_table.set_shapes(topology.solids, topology, geometry_key)
+        self.face_table.set_shapes(topology.faces, topology, geometry_key)
+        self.edge_table.set_shapes(topology.edges, topology, geometry_key)
+        # also shows the visibility restored from a saved case
+        with self.timings.phase("webgui_draw"):
+            self.draw_geometry(geometry_key)
+        with self.timings.phase("artifact_store"):
+            self.store_geometry_artifact()
+        self.update_estimate()
+        # small features are detected on request, it measures every sub shape
+        for table in self.shapetype_tables.values():
+            table.small = None
+        self.heal_tolerance.ui_model_value = float(f"{default_tolerance * size:.2g}")
+        self.heal_button.ui_disable = False
+        self.heal_info.ui_children = [
+            "Detect lists the features below this size, search 'small' in the"
+            " tables to select them."
+        ]
         self.ui_hidden = False
 
 
-class MeshingApp(App):
+class MeshingApp(appconfig.MeshingApp):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.geo = None
+        self._upload_start = None
         self.create_layout()
+        # netgen is imported while the user picks a file
+        threading.Thread(target=warm_up, daemon=True).start()
 
     def create_layout(self):
         self.geo_upload_layout = self.create_geo_upload_layout()
@@ -791,19 +2007,68 @@ class MeshingApp(App):
     def _update_geometry(self):
         import os
         self.name = os.path.splitext(self.geo_upload.filename)[-2]
-        with self.geo_upload.as_temporary_file as geo_file:
-            import netgen.occ as ngocc
-            self.main_layout.build_from_shape(
-                shape=ngocc.OCCGeometry(str(geo_file)).shape, name=self.name
+        timings = JobTimings(self.name)
+        if self._upload_start is not None:
+            timings.add("upload", time.perf_counter() - self._upload_start)
+            self._upload_start = None
+        self.main_layout.timings = timings
+        # a saved case brings its geometry and mesh, the upload is not needed
+        layout = self.main_layout
+        artifacts = layout._saved_artifacts or {}
+        layout._saved_artifacts = None
+        shape = None
+        if artifacts.get("geometry"):
+            with timings.phase("artifact_load"):
+                shape = layout.saved_geometry(artifacts)
+            if shape is None:
+                # evicted from the artifact cache, built from the upload again
+                timings.counts["geometry_artifact_miss"] = 1
+        if shape is None and artifacts.get("heal"):
+            # the upload is the source of the healed geometry of the case
+            self._import_upload(timings)
+            with timings.phase("artifact_load"):
+                shape = layout.saved_geometry(artifacts)
+        if shape is not None:
+            layout.build_from_shape(
+                shape=shape, name=self.name, geometry_key=artifacts["geometry"]
             )
+            layout._heal = artifacts.get("heal")
+            if layout._heal is not None:
+                layout.heal_tolerance.ui_model_value = layout._heal["tolerance"]
+            layout.load_saved_mesh(artifacts)
+        else:
+            key, shape = self._import_upload(timings)
+            layout.build_from_shape(shape=shape, name=self.name, geometry_key=key)
+            if key == artifacts.get("geometry"):
+                # the saved mesh still fits the upload
+                layout.load_saved_mesh(artifacts)
         self.geo_uploading.ui_hidden = True
         self.geo_upload_layout.ui_hidden = True
 
+    def _import_upload(self, timings):
+        with self.geo_upload.as_temporary_file as geo_file:
+            key = hash_file(str(geo_file))
+            with timings.phase("step_import"):
+                shape = geometry_cache.get(key)
+                if shape is None:
+                    import netgen.occ as ngocc
+                    shape = ngocc.OCCGeometry(str(geo_file)).shape
+                    geometry_cache.put(key, shape)
+                else:
+                    timings.counts["geometry_cache_hit"] = 1
+        return key, shape
+
     def load(self, *args, **kwargs):
         super().load(*args, **kwargs)
 
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        self.load_dialog.simulations.invalidate()
+        return result
+
 
     def restart(self):
+        self.main_layout.cancel_mesh()
         if "id" in self.metadata:
             self.metadata.pop("id")
         self.geo_upload.ui_model_value = None
@@ -820,6 +2085,7 @@ class MeshingApp(App):
             ui_error_message="Please upload a valid geometry file",
         )
         def set_loading():
+            self._upload_start = time.perf_counter()
             self.geo_uploading.ui_hidden = False
         self.geo_upload.on_update_model_value(set_loading)
         self.geo_upload.on_file_loaded(self._update_geometry)
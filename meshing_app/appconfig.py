@@ -1,9 +1,20 @@
 from webapp_client import AppConfig, AppAccessConfig, AccessLevel
+from webapp_client.app import App
 from .version import __version__
-from .app import MeshingApp
 from webapp_client.utils import load_image
 import os
 
+
+class MeshingApp(App):
+    # Registered at plugin discovery. The app module with all components,
+    # numpy and the meshing code is imported when the first session is
+    # opened, sessions are instances of app.MeshingApp, a subclass of this.
+    def __new__(cls, *args, **kwargs):
+        if cls is MeshingApp:
+            from .app import MeshingApp as cls
+        return super().__new__(cls)
+
+
 config = AppConfig(
     name="Meshing App",
     version=__version__,
@@ -12,7 +23,7 @@ config = AppConfig(
     frontend_dependencies=[],
     image=load_image(os.path.join(
         os.path.dirname(__file__),"assets/app_image.png")),
-    description="Create a mesh from a STEP geometry file. Assign boundary conditions and mesh size interactively. Download the mesh in Netgen format.",
+    description="Create a mesh from a STEP geometry file. Assign boundary conditions and mesh size interactively. Download the mesh in Netgen, Gmsh, Abaqus and other formats.",
     compute_environments=[],
     access=AppAccessConfig(default_level = AccessLevel.STANDARD),
 )
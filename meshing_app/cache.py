@@ -0,0 +1,185 @@
+import collections
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from .meshing import apply_overrides, shape_overrides
+
+cache_dir = os.environ.get(
+    "MESHING_APP_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "meshing_app"),
+)
+
+
+def hash_file(filename, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_json(data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def mesh_key(geometry_hash, parameters, dim, overrides, parallel=False):
+    data = {
+        "geometry": geometry_hash,
+        "parameters": parameters,
+        "dim": dim,
+        "overrides": overrides,
+    }
+    if parallel:
+        data["parallel"] = True
+    return hash_json(data)
+
+
+# Size bounded directory of files named by their key. The modification time
+# is bumped on every hit, so the least recently used entries are evicted first.
+# Writes are atomic, several sessions can share the same directory.
+class FileCache:
+    def __init__(self, directory, max_size, suffix=""):
+        self.directory = directory
+        self.max_size = max_size
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, filename):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(filename, tmp)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self.evict()
+        return self.path(key)
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(self.suffix) or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_size:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+mesh_cache = FileCache(
+    os.path.join(cache_dir, "meshes"),
+    max_size=int(os.environ.get("MESHING_APP_MESH_CACHE_SIZE", 2 * 1024**3)),
+    suffix=".vol",
+)
+
+# Geometry viewer data, see tessellation.py
+tessellation_cache = FileCache(
+    os.path.join(cache_dir, "tessellations"),
+    max_size=int(
+        os.environ.get("MESHING_APP_TESSELLATION_CACHE_SIZE", 512 * 1024**2)
+    ),
+    suffix=".pickle",
+)
+
+
+# Imported shapes by hash of the uploaded file. The disk layer stores native
+# BREP plus the shape names/maxh (BREP does not carry them), the memory layer
+# keeps pristine shapes and hands out copies, since netgen attaches names and
+# colours to the underlying TShape and sessions must not share them.
+class GeometryCache:
+    def __init__(self, directory, max_size, max_items):
+        self.breps = FileCache(directory, max_size, suffix=".brep")
+        self.properties = FileCache(directory, max_size, suffix=".json")
+        self.max_items = max_items
+        self._shapes = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, shape):
+        with self._lock:
+            self._shapes[key] = shape
+            self._shapes.move_to_end(key)
+            while len(self._shapes) > self.max_items:
+                self._shapes.popitem(last=False)
+
+    def get(self, key):
+        import netgen.occ as ngocc
+
+        with self._lock:
+            shape = self._shapes.get(key)
+            if shape is not None:
+                self._shapes.move_to_end(key)
+        if shape is None:
+            brep, properties = self.breps.get(key), self.properties.get(key)
+            if brep is None or properties is None:
+                return None
+            shape = ngocc.OCCGeometry(brep).shape
+            with open(properties) as f:
+                apply_overrides(shape, json.load(f))
+            self._remember(key, shape)
+        return shape.Move((0, 0, 0))
+
+    def has(self, key):
+        return self.breps.get(key) is not None and self.properties.get(key) is not None
+
+    def put(self, key, shape, properties=None):
+        # properties default to the names and maxh currently set on the shape
+        if properties is None:
+            properties = shape_overrides(shape)
+        with tempfile.TemporaryDirectory() as tmp:
+            brep = os.path.join(tmp, "shape.brep")
+            properties_file = os.path.join(tmp, "shape.json")
+            shape.WriteBrep(brep)
+            with open(properties_file, "w") as f:
+                json.dump(properties, f)
+            self.breps.put(key, brep)
+            self.properties.put(key, properties_file)
+        self._remember(key, shape.Move((0, 0, 0)))
+
+
+geometry_cache = GeometryCache(
+    os.path.join(cache_dir, "geometries"),
+    max_size=int(os.environ.get("MESHING_APP_GEOMETRY_CACHE_SIZE", 1024**3)),
+    max_items=int(os.environ.get("MESHING_APP_GEOMETRY_CACHE_ITEMS", 8)),
+)
+
+
+# Geometries and meshes of saved cases by content hash, shared by all cases.
+# This is a cache, not storage: the least recently used are evicted beyond
+# MESHING_APP_ARTIFACT_SIZE bytes of geometries and of meshes. A missing
+# artifact is a cache miss, the case imports its uploaded file again and is
+# meshed on request.
+artifact_dir = os.environ.get(
+    "MESHING_APP_ARTIFACT_DIR", os.path.join(cache_dir, "artifacts")
+)
+artifact_size = int(os.environ.get("MESHING_APP_ARTIFACT_SIZE", 4 * 1024**3))
+case_geometries = GeometryCache(artifact_dir, artifact_size, max_items=0)
+case_meshes = FileCache(artifact_dir, artifact_size, suffix=".vol.gz")
@@ -0,0 +1,62 @@
+import argparse
+import json
+import logging
+import os
+import sys
+
+from .meshing import mesh_cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="meshing-app",
+        description="Mesh geometry files without the web interface.",
+    )
+    parser.add_argument("geometries", nargs="*", help="step or brep files")
+    parser.add_argument(
+        "-s",
+        "--settings",
+        help="JSON case saved by the app or settings by component id (maxh, "
+        "mesh_granularity, ...) used for all geometries given on the command line",
+    )
+    parser.add_argument(
+        "--jobs",
+        help='JSON list of jobs {"geometry": ..., "settings": ..., "output": ...}',
+    )
+    parser.add_argument(
+        "-o", "--output-dir", help="directory for the meshes (default: next to input)"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of meshing processes (default: number of cores)",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s")
+
+    jobs = []
+    if args.jobs:
+        with open(args.jobs) as f:
+            jobs = json.load(f)
+    for geometry in args.geometries:
+        job = {"geometry": geometry, "settings": args.settings}
+        if args.output_dir:
+            name = os.path.splitext(os.path.basename(geometry))[0]
+            job["output"] = os.path.join(args.output_dir, name + ".vol")
+        jobs.append(job)
+    if not jobs:
+        parser.error("no geometries or jobs given")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    failed = 0
+    for result in mesh_cases(jobs, workers=args.workers):
+        print(json.dumps(result), flush=True)
+        failed += "error" in result
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+
+from .topology import min_over, pairs
+
+# Rough prediction of the mesh size before meshing. The local mesh size of
+# every solid, face and edge is bounded by maxh, per shape maxh, curvature
+# and segments per edge; from small edges and faces it grows with the grading
+# towards the size of the surrounding face or solid. Integrating the element
+# density over these zones gives the element counts. The constants were
+# fitted against netgen meshes of test geometries, expect a factor of two
+# or three either way.
+
+surface_scale = 0.9
+volume_scale = 0.4
+curvature_scale = 1.0
+grading_scale = 3.0
+surface_to_volume = 1.6
+# seconds and bytes per element, fixed cost of a meshing process
+seconds_per_element = 2e-4
+seconds_base = 1.5
+bytes_per_element = 1500
+bytes_base = 100 * 1024**2
+
+# 0 disables the limit
+max_elements = int(os.environ.get("MESHING_APP_MAX_ELEMENTS", 20_000_000))
+max_memory = int(os.environ.get("MESHING_APP_MAX_MEMORY", 0))
+# "refuse" to start jobs over the limits or only "warn"
+limit_action = os.environ.get("MESHING_APP_LIMIT_ACTION", "refuse")
+
+_trig_area = 3**0.5 / 4
+_tet_volume = 1 / (6 * 2**0.5)
+
+
+def estimate_mesh(topology, parameters, maxhs, dim=3):
+    # parameters as passed to GenerateMesh, maxhs the per shape maxh arrays
+    # by shape type ("solids", "faces", "edges")
+    bb = topology.shape.bounding_box
+    diagonal = sum((bb[1][i] - bb[0][i]) ** 2 for i in range(3)) ** 0.5 or 1
+    h_max = min(parameters.get("maxh", diagonal), diagonal)
+    safety = parameters.get("curvaturesafety", 2)
+    per_edge = parameters.get("segmentsperedge", 1)
+    grading = grading_scale * max(parameters.get("grading", 0.3), 0.01)
+
+    volumes = topology.measures("solids")
+    areas = topology.measures("faces")
+    lengths = topology.measures("edges")
+    # elements are never larger than the shape they mesh
+    h_solid = np.minimum(h_max, np.asarray(maxhs["solids"], dtype=float))
+    h_solid = np.minimum(h_solid, np.cbrt(volumes))
+    h_face = np.minimum(h_max, np.asarray(maxhs["faces"], dtype=float))
+    h_face = np.minimum(h_face, np.sqrt(areas))
+    if len(volumes):
+        h_face = np.minimum(h_face, min_over(h_solid, topology.face_solids, h_max))
+    # curved faces are bounded by the curvature of their edges
+    radii = topology.edge_radii
+    face_radii = min_over(radii, topology.face_edges, np.inf)
+    if topology.tessellation is not None:
+        flat = np.linalg.norm(topology.face_normals, axis=1) > 0.99
+        face_radii[flat] = np.inf
+    h_face = np.minimum(h_face, curvature_scale * face_radii / safety)
+    h_edge = np.minimum(h_max, np.asarray(maxhs["edges"], dtype=float))
+    h_edge = np.minimum(h_edge, lengths)
+    h_edge = np.minimum(h_edge, curvature_scale * radii / safety)
+    h_edge = np.minimum(h_edge, min_over(h_face, topology.edge_faces, h_max))
+    h_edge = np.minimum(h_edge, lengths / per_edge)
+    h_edge = np.maximum(h_edge, 1e-6 * diagonal)
+
+    # surface: uniform part of every face plus the graded bands along edges
+    faces, edges = pairs(topology.face_edges)
+    bands = np.maximum(0, 1 / h_edge[edges] - 1 / h_face[faces])
+    n_surface = surface_scale * (
+        (areas / (_trig_area * h_face**2)).sum()
+        + (lengths[edges] / (_trig_area * grading) * bands).sum()
+    )
+    if dim == 2 or len(volumes) == 0:
+        elements = n_surface
+    else:
+        # volume: uniform part of every solid, layers along faces and
+        # quarter tubes along edges where the mesh is finer than around them
+        solids, faces = pairs(topology.solid_faces)
+        layers = np.maximum(0, h_face[faces] ** -2 - h_solid[solids] ** -2)
+        h_around = min_over(h_face, topology.edge_faces, h_max)
+        tubes = np.maximum(0, 1 / h_edge - 1 / h_around) ** 2 * h_edge
+        elements = volume_scale * (
+            (volumes / (_tet_volume * h_solid**3)).sum()
+            + (areas[faces] / (_tet_volume * 2 * grading) * layers).sum()
+            + (np.pi * lengths / (_tet_volume * 4 * grading**2) * tubes).sum()
+        )
+        # thin solids get at least about one layer of tetrahedra
+        elements = max(elements, surface_to_volume * n_surface)
+    return {
+        "elements": int(elements),
+        "surface_elements": int(n_surface),
+        "seconds": float(seconds_base + seconds_per_element * elements),
+        "memory": int(bytes_base + bytes_per_element * elements),
+    }
+
+
+def check_limits(estimate):
+    # message if the estimate exceeds the configured limits, else None
+    if max_elements and estimate["elements"] > max_elements:
+        return (
+            f"The mesh would have about {estimate['elements']:,} elements, "
+            f"the limit is {max_elements:,}."
+        )
+    if max_memory and estimate["memory"] > max_memory:
+        return (
+            f"Meshing would need about {estimate['memory'] / 1024**3:.1f} GB of "
+            f"memory, the limit is {max_memory / 1024**3:.1f} GB."
+        )
+    return None
@@ -0,0 +1,137 @@
+import gzip
+import importlib.util
+import shutil
+
+import numpy as np
+
+chunk_size = 1 << 20
+
+# name: (label, file extension, netgen export format or None for meshio)
+formats = {
+    "netgen": ("Netgen", ".vol", None),
+    "gmsh2": ("Gmsh 2", ".msh", "Gmsh2 Format"),
+    "abaqus": ("Abaqus", ".inp", "Abaqus Format"),
+    "fluent": ("Fluent", ".msh", "Fluent Format"),
+}
+if importlib.util.find_spec("meshio") is not None:
+    formats["vtu"] = ("VTK", ".vtu", None)
+    if importlib.util.find_spec("h5py") is not None:
+        formats["med"] = ("MED", ".med", None)
+
+# netgen element type -> (meshio cell type, node order), second order
+# elements list their edge midpoints in another order than meshio (VTK)
+_cell_types = {
+    10: ("triangle", [0, 1, 2]),
+    11: ("quad", [0, 1, 2, 3]),
+    12: ("triangle6", [0, 1, 2, 5, 3, 4]),
+    20: ("tetra", [0, 1, 2, 3]),
+    21: ("tetra10", [0, 1, 2, 3, 4, 7, 5, 6, 8, 9]),
+    22: ("pyramid", [0, 1, 2, 3, 4]),
+    23: ("wedge", [0, 1, 2, 3, 4, 5]),
+    25: ("hexahedron", [0, 1, 2, 3, 4, 5, 6, 7]),
+}
+
+compressions = {"none": "", "gzip": ".gz"}
+if importlib.util.find_spec("zstandard") is not None:
+    compressions["zstd"] = ".zst"
+
+
+def open_compressed(filename, compression):
+    if compression == "gzip":
+        return gzip.open(filename, "wb", compresslevel=6)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(filename, "wb"))
+    return open(filename, "wb")
+
+
+def compress_file(source, target, compression):
+    with open(source, "rb") as fin, open_compressed(target, compression) as fout:
+        shutil.copyfileobj(fin, fout, chunk_size)
+    return target
+
+
+def mesh_cells(elements):
+    # Elements of one dimension as (cell type, 0-based vertices, region index)
+    # blocks, taken from the NumPy view without a loop over the elements.
+    data = elements.NumPy()
+    unknown = set(np.unique(data["type"]).tolist()) - _cell_types.keys()
+    if unknown:
+        raise ValueError(
+            f"Cannot export netgen element types {sorted(unknown)} in this format"
+        )
+    cells = []
+    for el_type, (cell_type, order) in _cell_types.items():
+        mask = data["type"] == el_type
+        if mask.any():
+            cells.append(
+                (cell_type, data["nodes"][mask][:, order] - 1, data["index"][mask])
+            )
+    return cells
+
+
+def _write_meshio(mesh, target):
+    import meshio
+
+    # The cells of the mesh with their region, for 3D meshes also the boundary
+    # faces with their bc index. Names are cell sets "region:<name>" and
+    # "boundary:<name>", and groups in MED files.
+    blocks = [
+        (cell_type, nodes, "region", index)
+        for cell_type, nodes, index in mesh_cells(
+            mesh.Elements3D() if mesh.dim == 3 else mesh.Elements2D()
+        )
+    ]
+    names = {"region": mesh.GetRegionNames(codim=0)}
+    if mesh.dim == 3:
+        blocks += [
+            (cell_type, nodes, "boundary", index)
+            for cell_type, nodes, index in mesh_cells(mesh.Elements2D())
+        ]
+        names["boundary"] = mesh.GetRegionNames(codim=1)
+    cell_data = {
+        kind: [index * (k == kind) for _, _, k, index in blocks] for kind in names
+    }
+    # VTU files get them as one cell data array named after the sets
+    numbers = {}
+    for kind, kind_names in names.items():
+        for index, name in enumerate(kind_names, 1):
+            numbers.setdefault(f"{kind}:{name}", (kind, []))[1].append(index)
+    cell_sets = {
+        key: [
+            np.flatnonzero(np.isin(index, indices) & (k == kind))
+            for _, _, k, index in blocks
+        ]
+        for key, (kind, indices) in numbers.items()
+    }
+    out = meshio.Mesh(
+        mesh.Coordinates(),
+        [(cell_type, nodes) for cell_type, nodes, _, _ in blocks],
+        cell_data=cell_data,
+        cell_sets=cell_sets,
+    )
+    if target.endswith(".med"):
+        # MED groups: one family of elements (negative numbers) for every
+        # region and bc, regions first
+        offsets = {"region": 0, "boundary": len(names["region"])}
+        out.cell_data["cell_tags"] = [
+            -(offsets[kind] + index) for _, _, kind, index in blocks
+        ]
+        out.cell_tags = {
+            -(offsets[kind] + index): [name]
+            for kind, kind_names in names.items()
+            for index, name in enumerate(kind_names, 1)
+        }
+    meshio.write(target, out)
+
+
+def export_mesh(mesh, mesh_file, fmt, target):
+    netgen_format = formats[fmt][2]
+    if fmt == "netgen":
+        return mesh_file
+    if netgen_format is not None:
+        mesh.Export(target, netgen_format)
+    else:
+        _write_meshio(mesh, target)
+    return target
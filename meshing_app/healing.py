@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+
+from .meshing import shape_types
+from .topology import min_over, pairs
+
+# Small features of imported geometries force netgen to refine far below
+# the requested mesh size. They are detected from the topology and removed
+# on request with the OCC shape healing of netgen, which drops short edges
+# and merges sliver (strip) and spot faces like tiny fillets into their
+# neighbours. Healing renumbers all sub shapes, names and maxh are carried
+# over to the healed sub shape nearest to the original one.
+
+# relative to the bounding box diagonal
+default_tolerance = float(os.environ.get("MESHING_APP_HEAL_TOLERANCE", 1e-3))
+
+
+def small_features(topology, tolerance):
+    # indices of the sub shapes smaller than tolerance by shape type
+    lengths = topology.measures("edges")
+    areas = topology.measures("faces")
+    volumes = topology.measures("solids")
+    radii = topology.edge_radii
+    edges = (lengths < tolerance) | (radii < tolerance)
+
+    # width of a strip face is about twice its area over its perimeter,
+    # curved faces are as small as the radius of their edges
+    face_ids, edge_ids = pairs(topology.face_edges)
+    perimeters = np.bincount(face_ids, lengths[edge_ids], len(areas))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        widths = 2 * areas / perimeters
+    face_radii = min_over(radii, topology.face_edges, np.inf)
+    if topology.tessellation is not None:
+        flat = np.linalg.norm(topology.face_normals, axis=1) > 0.99
+        face_radii[flat] = np.inf
+    faces = (widths < tolerance) | (face_radii < tolerance)
+
+    solid_ids, face_ids = pairs(topology.solid_faces)
+    surfaces = np.bincount(solid_ids, areas[face_ids], len(volumes))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        thickness = 3 * volumes / surfaces
+    solids = thickness < tolerance
+    return {
+        "solids": np.flatnonzero(solids).tolist(),
+        "faces": np.flatnonzero(faces).tolist(),
+        "edges": np.flatnonzero(edges).tolist(),
+    }
+
+
+def heal_shape(shape, tolerance):
+    import netgen.occ as ngocc
+
+    geometry = ngocc.OCCGeometry(shape, copy=True)
+    geometry.Heal(tolerance=tolerance)
+    # the copy keeps names and maxh, they are set by transfer_properties only
+    for shape_type in shape_types:
+        for sub_shape in getattr(geometry.shape, shape_type):
+            sub_shape.name = None
+            sub_shape.maxh = 1e99
+    return geometry.shape
+
+
+def _centers(shapes):
+    points = [shape.center for shape in shapes]
+    return np.array([(p.x, p.y, p.z) for p in points], dtype=float).reshape(-1, 3)
+
+
+def _nearest(points, targets):
+    # index of and distance to the nearest target of every point
+    index = np.zeros(len(points), dtype=np.int64)
+    distance = np.full(len(points), np.inf)
+    if len(targets) == 0:
+        return index, distance
+    chunk = max(1, (1 << 20) // len(targets))
+    for start in range(0, len(points), chunk):
+        d = np.linalg.norm(points[start : start + chunk, None] - targets[None], axis=2)
+        nearest = d.argmin(axis=1)
+        index[start : start + chunk] = nearest
+        distance[start : start + chunk] = d[np.arange(len(d)), nearest]
+    return index, distance
+
+
+def matches(originals, shapes, tolerance):
+    # index of the original sub shape of every healed one, -1 where its
+    # centre moved more than a few tolerances
+    index, distance = _nearest(_centers(shapes), _centers(originals))
+    index[distance > 10 * tolerance] = -1
+    return index
+
+
+def transfer_properties(topology, healed, tolerance, properties=None):
+    # names and maxh of the original sub shapes, or lists of them by shape
+    # type in properties, to the matching healed ones
+    for shape_type in shape_types:
+        originals = getattr(topology, shape_type)
+        if properties is None:
+            names = [shape.name for shape in originals]
+            maxhs = [shape.maxh for shape in originals]
+        else:
+            names, maxhs = properties[shape_type]
+        if all(name is None for name in names) and min(maxhs, default=1e99) > 1e98:
+            continue
+        shapes = getattr(healed, shape_type)
+        for shape, i in zip(shapes, matches(originals, shapes, tolerance).tolist()):
+            if i < 0:
+                continue
+            if names[i] is not None:
+                shape.name = names[i]
+            if maxhs[i] < 1e98:
+                shape.maxh = maxhs[i]
+    return healed
@@ -0,0 +1,338 @@
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import time
+
+from .timing import near_memory_limit
+
+# Meshing without any UI: used by the app's worker processes and for batch
+# meshing of saved settings (see cli.py).
+
+mesh_options = {
+    "very_coarse": {"curvaturesafety": 1, "segmentsperedge": 0.3, "grading": 0.7},
+    "coarse": {"curvaturesafety": 1.5, "segmentsperedge": 0.5, "grading": 0.5},
+    "moderate": {"curvaturesafety": 2, "segmentsperedge": 1, "grading": 0.3},
+    "fine": {"curvaturesafety": 3, "segmentsperedge": 2, "grading": 0.3},
+    "very_fine": {"curvaturesafety": 5, "segmentsperedge": 3, "grading": 0.1},
+}
+
+shape_types = ("solids", "faces", "edges")
+
+# smallest share of a job's memory limit given to a per-solid worker
+worker_min_memory = 512 * 1024**2
+
+# Settings are keyed by the ids of the app's components, so that a case saved
+# by the app can be meshed as it is (see case_settings). The netgen parameter
+# of every settings component:
+parameter_ids = {
+    "maxh": "maxh",
+    "curvature_safety": "curvaturesafety",
+    "segments_per_edge": "segmentsperedge",
+    "grading": "grading",
+}
+settings_ids = ("mesh_dimension", "mesh_granularity", *parameter_ids, "parallel")
+
+
+def meshing_parameters(settings):
+    mp = dict(mesh_options.get(settings.get("mesh_granularity"), {}))
+    for key, parameter in parameter_ids.items():
+        if settings.get(key):
+            mp[parameter] = float(settings[key])
+    return mp
+
+
+def _component_value(data):
+    # components dump their model value, possibly among other props
+    while isinstance(data, dict):
+        for key in ("model_value", "modelValue", "ui_model_value"):
+            if key in data:
+                return data[key]
+        if "props" not in data:
+            return None
+        data = data["props"]
+    return data
+
+
+def case_settings(case):
+    # Settings of a case saved by the app, given as App.dump(), its "data" or
+    # plain {id: value}. Ids inside the settings card carry its namespace.
+    data = case.get("data", case)
+    components = {str(key).rsplit(".", 1)[-1]: value for key, value in data.items()}
+    settings = {}
+    for key in settings_ids:
+        if key in components:
+            settings[key] = _component_value(components[key])
+    for shape_type in shape_types:
+        if components.get(shape_type):
+            settings[shape_type] = components[shape_type]
+    return settings
+
+
+def shape_overrides(shape):
+    overrides = {}
+    for shape_type in shape_types:
+        rows = []
+        for index, sub_shape in enumerate(getattr(shape, shape_type)):
+            name = sub_shape.name
+            maxh = sub_shape.maxh if sub_shape.maxh < 1e98 else None
+            if name is not None or maxh is not None:
+                rows.append([index, name, maxh])
+        overrides[shape_type] = rows
+    return overrides
+
+
+def table_overrides(data):
+    # table state as stored by ShapeTable.dump(), version 1 has a dict per row
+    if "rows" in data:
+        rows = data["rows"]
+    else:
+        rows = {}
+        for index, name in zip(data.get("name_index", []), data.get("name", [])):
+            rows[index] = {"index": index, "name": name}
+        for index, maxh in zip(data.get("maxh_index", []), data.get("maxh", [])):
+            rows.setdefault(index, {"index": index})["maxh"] = maxh
+        rows = [rows[index] for index in sorted(rows)]
+    # A stored None is a name or maxh that was cleared, it becomes "" or
+    # 1e99 here. A missing key keeps the value of the geometry file (None).
+    overrides = []
+    for row in rows:
+        name = (row["name"] or "") if "name" in row else None
+        maxh = row.get("maxh")
+        if "maxh" in row and (maxh is None or maxh > 1e98):
+            maxh = 1e99
+        if name is not None or maxh is not None:
+            overrides.append([row["index"], name, maxh])
+    return overrides
+
+
+def settings_overrides(settings):
+    return {
+        shape_type: table_overrides(settings[shape_type])
+        for shape_type in shape_types
+        if settings.get(shape_type)
+    }
+
+
+def apply_overrides(shape, overrides):
+    for shape_type, rows in overrides.items():
+        shapes = getattr(shape, shape_type)
+        for index, name, maxh in rows:
+            if name is not None:
+                # an empty name clears the name of the geometry file
+                shapes[index].name = name or None
+            if maxh is not None:
+                shapes[index].maxh = maxh
+
+
+def load_shape(filename):
+    import netgen.occ as ngocc
+
+    return ngocc.OCCGeometry(str(filename)).shape
+
+
+def generate_mesh(shape, dim=3, parameters=None, overrides=None):
+    import netgen.occ as ngocc
+
+    apply_overrides(shape, overrides or {})
+    return ngocc.OCCGeometry(shape, dim=dim).GenerateMesh(**(parameters or {}))
+
+
+def _limit_worker(memory, cpu):
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    if memory:
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    if cpu:
+        # SIGXCPU at the soft limit, the hard limit would SIGKILL
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+
+
+def _mesh_volume(points, trigs, parameters):
+    import netgen.meshing as ngmeshing
+    import numpy as np
+
+    start = time.perf_counter()
+    mesh = ngmeshing.Mesh(dim=3)
+    mesh.AddPoints(points)
+    mesh.Add(ngmeshing.FaceDescriptor(surfnr=1, domin=1, domout=0, bc=1))
+    mesh.AddElements(dim=2, index=1, data=trigs.astype(np.int32), base=0)
+    try:
+        mesh.GenerateVolumeMesh(**parameters)
+    except Exception:
+        if near_memory_limit():
+            raise MemoryError("Volume meshing exceeded the memory limit") from None
+        raise
+    if not mesh.ne:
+        # netgen gives up without raising when allocations fail
+        if near_memory_limit():
+            raise MemoryError("Volume meshing exceeded the memory limit")
+        raise RuntimeError("Volume meshing of a solid failed")
+    # the merge relies on the boundary points keeping their position and
+    # order, new points are appended
+    coordinates = mesh.Coordinates()
+    if len(coordinates) < len(points) or not np.array_equal(
+        coordinates[: len(points)], points
+    ):
+        raise RuntimeError("Volume meshing changed the surface mesh of a solid")
+    tets = mesh.Elements3D().NumPy()["nodes"].astype(np.int64) - 1
+    return coordinates[len(points) :], tets, time.perf_counter() - start
+
+
+def _enclosed(points, trigs):
+    # volume and centre enclosed by a closed triangle surface
+    import numpy as np
+
+    p = points[trigs]
+    volumes = np.einsum("ij,ij->i", p[:, 0], np.cross(p[:, 1], p[:, 2])) / 6
+    volume = volumes.sum()
+    if volume == 0:
+        return 0.0, np.zeros(3)
+    return abs(volume), (volumes @ p.sum(axis=1)) / (4 * volume)
+
+
+def generate_mesh_parallel(
+    shape, parameters=None, overrides=None, workers=None, limits=(0, 0)
+):
+    # The surface is meshed once for the whole geometry so that interfaces
+    # between solids stay conforming, then every solid is volume meshed in its
+    # own process and the volume elements are merged back into one mesh.
+    # limits (bytes of address space, CPU seconds) are shared by the workers.
+    import netgen.meshing as ngmeshing
+    import netgen.occ as ngocc
+    import numpy as np
+
+    parameters = parameters or {}
+    apply_overrides(shape, overrides or {})
+    # up to the optimised surface, netgen's MESHSURFACE step of Python
+    # already includes the surface optimisation
+    step = getattr(
+        ngmeshing.MeshingStep, "OPTSURFACE", ngmeshing.MeshingStep.MESHSURFACE
+    )
+    mesh = ngocc.OCCGeometry(shape, dim=3).GenerateMesh(**parameters, perfstepsend=step)
+    points = mesh.Coordinates()
+    elements = mesh.Elements2D().NumPy()
+    trigs = elements["nodes"][:, :3].astype(np.int64) - 1
+    fds = mesh.FaceDescriptors()
+    domin = np.array([0] + [fd.domin for fd in fds])[elements["index"]]
+    domout = np.array([0] + [fd.domout for fd in fds])[elements["index"]]
+
+    # Materials are only set by the volume meshing, so every domain is
+    # matched to the solid with the closest volume and centre and named
+    # after it. Every solid has to be matched exactly once.
+    solids = shape.solids
+    solid_volumes = np.array([solid.mass for solid in solids])
+    solid_centers = np.array(
+        [(c.x, c.y, c.z) for c in (solid.center for solid in solids)]
+    ).reshape(-1, 3)
+    origin = points.min(axis=0) if len(points) else np.zeros(3)
+    size = max(float(np.linalg.norm(np.ptp(points, axis=0))), 1e-300)
+    jobs = {}
+    domain_solids = {}
+    for domain in range(1, mesh.GetNDomains() + 1):
+        # solid on the outer side of a face sees it with flipped orientation
+        domain_trigs = np.vstack(
+            [trigs[domin == domain], trigs[domout == domain][:, ::-1]]
+        )
+        volume, center = _enclosed(points - origin, domain_trigs)
+        cost = np.linalg.norm(solid_centers - origin - center, axis=1) / size + np.abs(
+            solid_volumes - volume
+        ) / np.maximum(np.maximum(solid_volumes, volume), 1e-300)
+        domain_solids[domain] = int(cost.argmin()) if len(cost) else -1
+        used, local = np.unique(domain_trigs, return_inverse=True)
+        jobs[domain] = (used, points[used], local.reshape(domain_trigs.shape))
+    if sorted(domain_solids.values()) != list(range(len(solids))):
+        raise RuntimeError("The domains of the surface mesh do not match the solids")
+    for domain, index in domain_solids.items():
+        solid = solids[index]
+        mesh.SetMaterial(domain, solid.name or "default")
+        solid_parameters = dict(parameters)
+        if solid.maxh < solid_parameters.get("maxh", 1e99):
+            solid_parameters["maxh"] = solid.maxh
+        jobs[domain] += (solid_parameters,)
+
+    timings = {}
+    processes = min(workers or os.cpu_count() or 1, len(jobs))
+    if limits[0]:
+        # fewer workers rather than shares too small to even import netgen
+        processes = max(min(processes, limits[0] // worker_min_memory), 1)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_limit_worker,
+        initargs=tuple(limit and max(limit // processes, 1) for limit in limits),
+    ) as pool:
+        futures = {
+            pool.submit(_mesh_volume, *job[1:]): domain for domain, job in jobs.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            domain = futures[future]
+            new_points, tets, elapsed = future.result()
+            used = jobs[domain][0]
+            offset = len(mesh.Points())
+            mesh.AddPoints(new_points)
+            to_global = np.concatenate(
+                [used, np.arange(offset, offset + len(new_points))]
+            )
+            mesh.AddElements(
+                dim=3, index=domain, data=to_global[tets].astype(np.int32), base=0
+            )
+            timings[domain_solids[domain]] = elapsed
+    return mesh, timings
+
+
+def load_settings(settings):
+    if isinstance(settings, dict):
+        return settings
+    with open(settings) as f:
+        return json.load(f)
+
+
+def mesh_case(geometry, settings=None, output=None):
+    settings = case_settings(load_settings(settings)) if settings is not None else {}
+    if output is None:
+        output = os.path.splitext(geometry)[0] + ".vol"
+    start = time.perf_counter()
+    shape = load_shape(geometry)
+    dim = settings.get("mesh_dimension") or 3
+    result = {"geometry": str(geometry), "output": output}
+    if settings.get("parallel") and dim == 3 and len(shape.solids) > 1:
+        mesh, timings = generate_mesh_parallel(
+            shape,
+            parameters=meshing_parameters(settings),
+            overrides=settings_overrides(settings),
+        )
+        result["solid_times"] = timings
+    else:
+        mesh = generate_mesh(
+            shape,
+            dim=dim,
+            parameters=meshing_parameters(settings),
+            overrides=settings_overrides(settings),
+        )
+    mesh.Save(output)
+    return result | {
+        "elements": mesh.ne or len(mesh.Elements2D()),
+        "vertices": len(mesh.Points()),
+        "time": time.perf_counter() - start,
+    }
+
+
+def _mesh_case(job):
+    try:
+        return mesh_case(**job)
+    except Exception as e:
+        return {"geometry": str(job["geometry"]), "error": str(e)}
+
+
+def mesh_cases(jobs, workers=None):
+    # jobs are dicts with the arguments of mesh_case, results are yielded in
+    # order of completion, failed jobs carry an "error" entry
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = [pool.submit(_mesh_case, job) for job in jobs]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
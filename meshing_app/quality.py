@@ -0,0 +1,175 @@
+import os
+
+import numpy as np
+
+# Element quality of a mesh, computed on the NumPy views of the elements in
+# chunks, so millions of elements take seconds and bounded memory. Volume
+# meshes are rated by their tetrahedra, surface meshes by their triangles;
+# other element types are counted but not rated. The aspect ratio is 1 for
+# regular elements and grows for flat or needle like ones.
+
+max_aspect_ratio = float(os.environ.get("MESHING_APP_BAD_ASPECT_RATIO", 5))
+min_angle = float(os.environ.get("MESHING_APP_BAD_MIN_ANGLE", 10))
+max_angle = float(os.environ.get("MESHING_APP_BAD_MAX_ANGLE", 165))
+# bad elements drawn at most, the worst first
+max_highlight = int(os.environ.get("MESHING_APP_MAX_HIGHLIGHT", 100000))
+chunk_size = 1 << 18
+
+_tet_edges = np.array([(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)])
+# face opposite to every vertex and the two faces meeting at every edge
+_tet_faces = np.array([(1, 2, 3), (0, 3, 2), (0, 1, 3), (0, 2, 1)])
+_edge_faces = np.array([(2, 3), (1, 3), (1, 2), (0, 3), (0, 2), (0, 1)])
+
+
+def _tet_quality(p):
+    # p: (n, 4, 3) vertex coordinates
+    edges = p[:, _tet_edges[:, 1]] - p[:, _tet_edges[:, 0]]
+    longest = np.linalg.norm(edges, axis=2).max(axis=1)
+    volume = np.abs(
+        np.einsum("ij,ij->i", np.cross(edges[:, 0], edges[:, 1]), edges[:, 2])
+    ) / 6
+    a, b, c = (p[:, _tet_faces[:, i]] for i in range(3))
+    normals = np.cross(b - a, c - a)
+    double_areas = np.linalg.norm(normals, axis=2)
+    # point the normals away from the opposite vertex
+    inwards = np.einsum("ijk,ijk->ij", normals, p - a) > 0
+    normals[inwards] *= -1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normals /= double_areas[..., None]
+        cos = -np.einsum(
+            "ijk,ijk->ij", normals[:, _edge_faces[:, 0]], normals[:, _edge_faces[:, 1]]
+        )
+        angles = np.degrees(np.arccos(np.clip(cos, -1, 1)))
+        # longest edge over the inradius, scaled to 1 for a regular tetrahedron
+        inradius = 6 * volume / double_areas.sum(axis=1)
+        aspect = longest / (2 * 6**0.5 * inradius)
+    return volume, aspect, np.nanmin(angles, axis=1), np.nanmax(angles, axis=1)
+
+
+def _trig_quality(p):
+    # p: (n, 3, 3) vertex coordinates
+    edges = np.stack(
+        [p[:, 1] - p[:, 0], p[:, 2] - p[:, 1], p[:, 0] - p[:, 2]], axis=1
+    )
+    lengths = np.linalg.norm(edges, axis=2)
+    area = np.linalg.norm(np.cross(edges[:, 0], -edges[:, 2]), axis=1) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # angle at every vertex between its two edges
+        cos = -np.einsum("ijk,ijk->ij", edges, np.roll(edges, 1, axis=1)) / (
+            lengths * np.roll(lengths, 1, axis=1)
+        )
+        angles = np.degrees(np.arccos(np.clip(cos, -1, 1)))
+        # longest edge times perimeter over area, 1 for an equilateral triangle
+        aspect = lengths.max(axis=1) * lengths.sum(axis=1) / (4 * 3**0.5 * area)
+    return area, aspect, np.nanmin(angles, axis=1), np.nanmax(angles, axis=1)
+
+
+def element_quality(points, nodes, rate=_tet_quality):
+    # points: (m, 3) coordinates, nodes: (n, k) 0-based vertex indices
+    n = len(nodes)
+    result = {
+        name: np.empty(n, dtype=np.float32)
+        for name in ("volume", "aspect_ratio", "min_angle", "max_angle")
+    }
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        values = rate(points[nodes[start:stop]])
+        for name, value in zip(result, values):
+            result[name][start:stop] = value
+    return result
+
+
+def mesh_quality(mesh):
+    points = np.asarray(mesh.Coordinates(), dtype=float)
+    if points.shape[1] == 2:
+        points = np.pad(points, ((0, 0), (0, 1)))
+    data = mesh.Elements3D().NumPy()
+    rated = data["type"] == 20
+    dim, rate, nv = 3, _tet_quality, 4
+    if not rated.any():
+        data = mesh.Elements2D().NumPy()
+        rated = data["type"] == 10
+        dim, rate, nv = 2, _trig_quality, 3
+    numbers = np.flatnonzero(rated)
+    nodes = data["nodes"][numbers, :nv] - 1
+    quality = element_quality(points, nodes, rate)
+    quality.update(
+        dim=dim,
+        elements=numbers + 1,
+        nodes=nodes,
+        region=data["index"][numbers],
+        skipped=len(data) - len(numbers),
+    )
+    return quality
+
+
+def bad_elements(quality):
+    # nan marks degenerated elements, these are bad as well
+    return ~(
+        (quality["aspect_ratio"] <= max_aspect_ratio)
+        & (quality["min_angle"] >= min_angle)
+        & (quality["max_angle"] <= max_angle)
+    )
+
+
+def worst_elements(quality, n):
+    # positions of the n elements with the largest aspect ratio, worst first
+    aspect = np.nan_to_num(quality["aspect_ratio"], nan=np.inf)
+    n = min(n, len(aspect))
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    worst = np.argpartition(-aspect, n - 1)[:n]
+    return worst[np.argsort(-aspect[worst], kind="stable")]
+
+
+def histogram(values, bins=20, lower=None, upper=None, log=False):
+    # counts and bin edges, values outside [lower, upper] count to the
+    # first or last bin
+    values = values[np.isfinite(values)]
+    if log:
+        values = np.log10(values[values > 0])
+    if len(values) == 0:
+        return np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1)
+    lower = values.min() if lower is None else lower
+    upper = values.max() if upper is None else upper
+    if upper <= lower:
+        upper = lower + 1
+    counts, edges = np.histogram(np.clip(values, lower, upper), bins, (lower, upper))
+    return counts, 10**edges if log else edges
+
+
+def highlight_mesh(mesh, quality, mask):
+    # A surface mesh of the boundary, translucent, with the faces of the bad
+    # elements in red. It shares the points of the mesh.
+    import netgen.meshing as ngmeshing
+
+    bad = np.flatnonzero(mask)
+    if len(bad) > max_highlight:
+        aspect = quality["aspect_ratio"][bad]
+        bad = bad[worst_elements({"aspect_ratio": aspect}, max_highlight)]
+    nodes = quality["nodes"][bad]
+    if quality["dim"] == 3:
+        nodes = nodes[:, _tet_faces].reshape(-1, 3)
+    data = mesh.Elements2D().NumPy()
+    boundary = data["type"] == 10
+    if quality["dim"] == 2:
+        boundary[quality["elements"][bad] - 1] = False
+    highlight = ngmeshing.Mesh(dim=mesh.dim)
+    highlight.AddPoints(np.ascontiguousarray(mesh.Coordinates(), dtype=float))
+    layers = [
+        ((0.7, 0.7, 0.7, 0.3), data["nodes"][boundary, :3] - 1),
+        ((1, 0, 0, 1), nodes),
+    ]
+    for surfnr, (color, faces) in enumerate(layers, 1):
+        index = highlight.Add(
+            ngmeshing.FaceDescriptor(surfnr=surfnr, domin=1, bc=surfnr)
+        )
+        highlight.FaceDescriptors()[index - 1].color = color
+        if len(faces):
+            highlight.AddElements(
+                dim=2,
+                index=index,
+                data=np.ascontiguousarray(faces, dtype=np.int32),
+                base=0,
+            )
+    return highlight
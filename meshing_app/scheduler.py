@@ -0,0 +1,203 @@
+import itertools
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# Admission control for meshing jobs. Jobs wait in a queue of the server
+# process ordered by priority, then by the number of running and of started
+# jobs of their session (fair share), then by submission. The first job in this order
+# starts once enough CPU slots and memory are free on the host: a running
+# job holds locks on slot files in a directory shared by all server
+# processes and its first slot records the memory reserved for it. The OS
+# drops the locks of a process that dies, so slots never leak. Without
+# fcntl the slots are only counted within this process.
+
+
+def _physical_memory():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return 0
+
+
+max_cpus = int(os.environ.get("MESHING_APP_MAX_CPUS", 0)) or os.cpu_count() or 1
+# memory reserved by all running jobs together, 0 disables the check
+memory_budget = int(
+    os.environ.get("MESHING_APP_MEMORY_BUDGET", 0.8 * _physical_memory())
+)
+# limits of every meshing job (bytes of address space, CPU seconds); the
+# per-solid workers of parallel jobs get an equal share each
+job_memory_limit = int(os.environ.get("MESHING_APP_JOB_MEMORY_LIMIT", 0))
+job_cpu_limit = int(os.environ.get("MESHING_APP_JOB_CPU_LIMIT", 0))
+scheduler_dir = os.environ.get(
+    "MESHING_APP_SCHEDULER_DIR",
+    os.path.join(tempfile.gettempdir(), "meshing_app_scheduler"),
+)
+
+
+class Slots:
+    def __init__(self, directory, n, budget=0):
+        self.directory = directory
+        self.n = n
+        self.budget = budget
+        # memory of the slots held in this process without fcntl
+        self._local = {}
+
+    def _open(self, i):
+        os.makedirs(self.directory, exist_ok=True)
+        return open(os.path.join(self.directory, f"slot-{i}"), "a+")
+
+    def acquire(self, cpus, memory):
+        # slot handles or None if the host has no room for the job
+        if fcntl is None:
+            free = [i for i in range(self.n) if i not in self._local]
+            busy = sum(self._local.values())
+            if len(free) < cpus or not self._fits(busy, memory):
+                return None
+            for i in free[:cpus]:
+                self._local[i] = 0
+            self._local[free[0]] = memory
+            return free[:cpus]
+        held = []
+        busy = 0
+        for i in range(self.n):
+            f = self._open(i)
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.seek(0)
+                try:
+                    busy += int(f.read() or 0)
+                except ValueError:
+                    pass
+                f.close()
+                continue
+            if len(held) < cpus:
+                if not held:
+                    # reserve right away, so others scanning now see it
+                    self._write(f, memory)
+                held.append(f)
+            else:
+                fcntl.flock(f, fcntl.LOCK_UN)
+                f.close()
+        if len(held) < cpus or not self._fits(busy, memory):
+            self.release(held)
+            return None
+        return held
+
+    def _fits(self, busy, memory):
+        # a job over the budget still runs alone
+        return not self.budget or busy == 0 or busy + memory <= self.budget
+
+    def _write(self, f, memory):
+        f.seek(0)
+        f.truncate()
+        f.write(str(int(memory)))
+        f.flush()
+
+    def release(self, held):
+        for slot in held:
+            if fcntl is None:
+                self._local.pop(slot, None)
+                continue
+            self._write(slot, 0)
+            fcntl.flock(slot, fcntl.LOCK_UN)
+            slot.close()
+
+
+class Scheduler:
+    def __init__(
+        self, slots=None, limits=(job_memory_limit, job_cpu_limit), interval=0.5
+    ):
+        self.slots = slots or Slots(scheduler_dir, max_cpus, memory_budget)
+        self.limits = limits
+        self.interval = interval
+        self._queue = []
+        self._running = {}
+        # jobs started per session with queued or running jobs
+        self._started = {}
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, job, session=None, priority=0, cpus=1, memory=0):
+        job.state = "queued"
+        job.scheduler = self
+        job.limits = self.limits
+        with self._condition:
+            self._queue.append(
+                {
+                    "job": job,
+                    "session": session,
+                    "priority": priority,
+                    "cpus": max(1, min(cpus, self.slots.n)),
+                    "memory": memory,
+                    "order": next(self._order),
+                }
+            )
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._schedule()
+        return job
+
+    def remove(self, job):
+        with self._condition:
+            self._queue = [entry for entry in self._queue if entry["job"] is not job]
+            self._schedule()
+
+    def _waiting(self):
+        running = {}
+        for entry in self._running.values():
+            running[entry["session"]] = running.get(entry["session"], 0) + 1
+        return sorted(
+            self._queue,
+            key=lambda entry: (
+                -entry["priority"],
+                running.get(entry["session"], 0),
+                self._started.get(entry["session"], 0),
+                entry["order"],
+            ),
+        )
+
+    def _schedule(self):
+        for job, entry in list(self._running.items()):
+            if job.finished:
+                self.slots.release(entry["slots"])
+                del self._running[job]
+        # cancelled while queued
+        self._queue = [entry for entry in self._queue if entry["job"].state == "queued"]
+        waiting = self._waiting()
+        # only the first job may start, so large jobs are not starved
+        while waiting:
+            entry = waiting[0]
+            slots = self.slots.acquire(entry["cpus"], entry["memory"])
+            if slots is None:
+                break
+            entry["slots"] = slots
+            self._queue.remove(entry)
+            self._running[entry["job"]] = entry
+            session = entry["session"]
+            self._started[session] = self._started.get(session, 0) + 1
+            entry["job"].start(workers=entry["cpus"])
+            waiting = self._waiting()
+        for position, entry in enumerate(waiting, 1):
+            entry["job"].stage = f"Queued, position {position} of {len(waiting)}"
+        active = {entry["session"] for entry in self._queue}
+        active.update(entry["session"] for entry in self._running.values())
+        for session in set(self._started) - active:
+            del self._started[session]
+
+    def _run(self):
+        with self._condition:
+            while True:
+                self._condition.wait(self.interval)
+                self._schedule()
+
+
+scheduler = Scheduler()
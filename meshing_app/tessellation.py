@@ -0,0 +1,212 @@
+import os
+import pickle
+import re
+import tempfile
+import zlib
+
+import numpy as np
+
+from .cache import hash_json, tessellation_cache
+
+# Viewer data. Large geometries are first shown with a coarse preview that is
+# decimated from the full tessellation by vertex clustering, the full data is
+# sent afterwards. Both are cached on disk by geometry hash. Geometries with
+# many faces are tessellated in a separate process from their BREP file, so
+# the server does not touch the OCC shape from two threads. Large meshes are
+# shown by their boundary only, volume elements are drawn on demand.
+
+preview_resolution = int(os.environ.get("MESHING_APP_PREVIEW_RESOLUTION", 64))
+preview_min_triangles = int(
+    os.environ.get("MESHING_APP_PREVIEW_MIN_TRIANGLES", 50000)
+)
+background_min_faces = int(
+    os.environ.get("MESHING_APP_BACKGROUND_MIN_FACES", 100)
+)
+mesh_preview_min_elements = int(
+    os.environ.get("MESHING_APP_MESH_PREVIEW_MIN_ELEMENTS", 100000)
+)
+
+boundary_colors = [
+    (0.12, 0.47, 0.71, 1),
+    (1.0, 0.5, 0.05, 1),
+    (0.17, 0.63, 0.17, 1),
+    (0.84, 0.15, 0.16, 1),
+    (0.58, 0.4, 0.74, 1),
+    (0.55, 0.34, 0.29, 1),
+    (0.89, 0.47, 0.76, 1),
+    (0.74, 0.74, 0.13, 1),
+    (0.09, 0.75, 0.81, 1),
+]
+
+
+class Tessellation:
+    # drawable by the webgui like a shape
+    def __init__(self, data):
+        self.data = data
+
+    def _webgui_data(self):
+        # the webgui encodes the point lists in place and keeps the colours
+        return dict(
+            self.data,
+            Bezier_trig_points=list(self.data["Bezier_trig_points"]),
+            edges=list(self.data["edges"]),
+            colors=list(self.data["colors"]),
+            edge_colors=list(self.data["edge_colors"]),
+        )
+
+
+def tessellate(shape):
+    data = shape._webgui_data()
+    for name in ("Bezier_trig_points", "edges"):
+        data[name] = [np.asarray(p, dtype=np.float32) for p in data[name]]
+    return data
+
+
+def tessellate_brep(brep_file):
+    import netgen.occ as ngocc
+
+    shape = ngocc.OCCGeometry(brep_file).shape
+    shape.faces.col = (0.7, 0.7, 0.7)
+    return tessellate(shape)
+
+
+def n_triangles(data):
+    points = data["Bezier_trig_points"]
+    return len(points[0]) // 4 if points else 0
+
+
+def face_normals(data, n_faces):
+    # Area weighted mean of the unit normals of every face. Its length is 1
+    # for planar faces and shorter the more the normal varies over the face.
+    normals = np.zeros((n_faces, 3))
+    if data.get("order2d", 1) != 1 or len(data["Bezier_trig_points"]) != 6:
+        return normals
+    trig_data = data["Bezier_trig_points"]
+    p0, p1, p2 = (np.asarray(p).reshape(-1, 4) for p in trig_data[:3])
+    n = sum(np.asarray(n, dtype=float).reshape(-1, 3) for n in trig_data[3:])
+    length = np.linalg.norm(n, axis=1, keepdims=True)
+    n = np.divide(n, length, out=np.zeros_like(n), where=length > 0)
+    area = 0.5 * np.linalg.norm(
+        np.cross(p1[:, :3] - p0[:, :3], p2[:, :3] - p0[:, :3]), axis=1
+    )
+    face = p0[:, 3].astype(np.int64)
+    inside = face < n_faces
+    np.add.at(normals, face[inside], n[inside] * area[inside, None])
+    areas = np.bincount(face[inside], weights=area[inside], minlength=n_faces)
+    return normals / np.maximum(areas, 1e-300)[:, None]
+
+
+def decimate(data, resolution):
+    # Vertices are snapped to the centre of their cell in a grid with
+    # resolution cells along the bounding box diagonal, triangles and edge
+    # segments that collapse are dropped. Cells are shared by all faces, so
+    # the preview has no cracks along face boundaries.
+    if data.get("order2d", 1) != 1 or len(data["Bezier_trig_points"]) != 6:
+        return data
+    trig_data = data["Bezier_trig_points"]
+    points = np.stack([p.reshape(-1, 4) for p in trig_data[:3]])
+    normals = np.stack([n.reshape(-1, 3) for n in trig_data[3:]])
+    if data["edges"]:
+        edges = np.stack([e.reshape(-1, 4) for e in data["edges"]])
+    else:
+        edges = np.zeros((2, 0, 4), dtype=np.float32)
+    xyz = np.concatenate(
+        [points[..., :3].reshape(-1, 3), edges[..., :3].reshape(-1, 3)]
+    )
+    if len(xyz) == 0:
+        return data
+    lower = xyz.min(axis=0)
+    cell = np.linalg.norm(xyz.max(axis=0) - lower) / resolution
+    if cell == 0:
+        return data
+    ijk = np.floor((xyz - lower) / cell).astype(np.int64)
+    n = resolution + 2
+    _, inverse = np.unique(
+        (ijk[:, 0] * n + ijk[:, 1]) * n + ijk[:, 2], return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse)
+    centers = np.stack(
+        [np.bincount(inverse, weights=xyz[:, i]) / counts for i in range(3)], axis=1
+    )
+
+    n_points = points.shape[0] * points.shape[1]
+    t = inverse[:n_points].reshape(3, -1)
+    keep = (t[0] != t[1]) & (t[1] != t[2]) & (t[0] != t[2])
+    points = points[:, keep]
+    points[..., :3] = centers[t[:, keep]]
+    e = inverse[n_points:].reshape(2, -1)
+    keep_edges = e[0] != e[1]
+    edges = edges[:, keep_edges]
+    edges[..., :3] = centers[e[:, keep_edges]]
+    return dict(
+        data,
+        Bezier_trig_points=[p.ravel() for p in points]
+        + [n.ravel() for n in normals[:, keep]],
+        edges=[e.ravel() for e in edges] if data["edges"] else [],
+    )
+
+
+def _cached(key, compute):
+    # None if the data is not cached and compute is None
+    if key is None:
+        return compute and compute()
+    path = tessellation_cache.get(key)
+    if path is not None:
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+    if compute is None:
+        return None
+    data = compute()
+    fd, tmp = tempfile.mkstemp(suffix=".pickle")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tessellation_cache.put(key, tmp)
+    finally:
+        os.remove(tmp)
+    return data
+
+
+def tessellations(
+    geometry_key,
+    compute=None,
+    resolution=preview_resolution,
+    min_triangles=preview_min_triangles,
+):
+    # Returns the full data and the preview, None if no preview is needed.
+    # compute() tessellates on a cache miss, without it (None, None) is
+    # returned for geometries that are not cached.
+    full = _cached(geometry_key and hash_json({"geometry": geometry_key}), compute)
+    if full is None:
+        return None, None
+    if not resolution or n_triangles(full) < min_triangles:
+        return full, None
+    preview = _cached(
+        geometry_key
+        and hash_json({"geometry": geometry_key, "resolution": resolution}),
+        lambda: decimate(full, resolution),
+    )
+    return full, preview
+
+
+def boundary_color(name):
+    # same colour for the same name in every session
+    if not name or name == "default":
+        return (0.7, 0.7, 0.7, 1)
+    return boundary_colors[zlib.crc32(name.encode()) % len(boundary_colors)]
+
+
+def surface_mesh(mesh):
+    # boundary and interface elements only, coloured by boundary name
+    surface = mesh.GetSubMesh(faces=".*")
+    for fd in surface.FaceDescriptors():
+        fd.color = boundary_color(fd.bcname)
+    return surface
+
+
+def region_mesh(mesh, name):
+    return mesh.GetSubMesh(domains=re.escape(name))
@@ -0,0 +1,92 @@
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Timings are logged as one JSON record per event at level INFO.
+# MESHING_APP_LOG_LEVEL=WARNING silences them; where they go is up to the
+# server or the command line (see cli.py).
+logger = logging.getLogger("meshing_app")
+logger.setLevel(os.environ.get("MESHING_APP_LOG_LEVEL", "INFO").upper())
+logger.addHandler(logging.NullHandler())
+
+
+def peak_rss(children=False):
+    # peak resident memory in bytes of this process, with children=True also
+    # of its finished children
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+    unit = 1 if sys.platform == "darwin" else 1024
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if children:
+        rss = max(rss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return unit * rss
+
+
+def near_memory_limit():
+    # whether this process used up most of its address space limit (RLIMIT_AS)
+    if resource is None:
+        return False
+    limit = resource.getrlimit(resource.RLIMIT_AS)[0]
+    if limit == resource.RLIM_INFINITY:
+        return False
+    try:
+        with open("/proc/self/status") as f:
+            status = dict(line.split(":", 1) for line in f)
+        peak = int(status["VmPeak"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        unit = 1 if sys.platform == "darwin" else 1024
+        peak = unit * resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak > 0.9 * limit
+
+
+class JobTimings:
+    def __init__(self, case=None):
+        self.case = case
+        self.phases = {}
+        self.counts = {}
+        # peak resident memory in bytes of the meshing job, as measured by its
+        # worker, and of the app process
+        self.peak_rss = None
+        self.app_rss = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def add(self, name, seconds):
+        self.phases[name] = seconds
+
+    def report(self):
+        return {
+            "case": self.case,
+            "phases": self.phases,
+            "counts": self.counts,
+            "peak_rss": self.peak_rss,
+            "app_rss": self.app_rss,
+        }
+
+    def log(self, event):
+        self.app_rss = peak_rss()
+        logger.info(json.dumps({"event": event} | self.report()))
+
+    def summary(self):
+        lines = [f"{name}: {seconds:.2f} s" for name, seconds in self.phases.items()]
+        lines += [f"{name}: {count}" for name, count in self.counts.items()]
+        if self.peak_rss is not None:
+            lines.append(f"peak memory of meshing: {self.peak_rss / 1024**2:.0f} MB")
+        if self.app_rss is not None:
+            lines.append(f"peak memory of the app: {self.app_rss / 1024**2:.0f} MB")
+        return lines
@@ -0,0 +1,156 @@
+import functools
+import itertools
+
+import numpy as np
+
+from .tessellation import face_normals
+
+
+def _invert(maps, n):
+    # maps[i] lists the indices j related to i, returns the lists of i for every j
+    counts = [len(m) for m in maps]
+    targets = np.fromiter(
+        itertools.chain.from_iterable(maps), dtype=np.int64, count=sum(counts)
+    )
+    sources = np.repeat(np.arange(len(maps)), counts)
+    order = np.argsort(targets, kind="stable")
+    bounds = np.searchsorted(targets[order], np.arange(n + 1)).tolist()
+    sources = sources[order].tolist()
+    return [sources[bounds[j] : bounds[j + 1]] for j in range(n)]
+
+
+def pairs(groups):
+    # (i, j) index arrays for every j in groups[i]
+    counts = np.fromiter((len(group) for group in groups), np.int64, len(groups))
+    members = np.fromiter(
+        itertools.chain.from_iterable(groups), np.int64, int(counts.sum())
+    )
+    return np.repeat(np.arange(len(groups)), counts), members
+
+
+def min_over(values, groups, initial):
+    # minimum of values[j] for j in every group, initial for empty groups
+    result = np.full(len(groups), initial, dtype=float)
+    owners, members = pairs(groups)
+    np.minimum.at(result, owners, values[members])
+    return result
+
+
+class Topology:
+    # Index maps between the sub shapes of a geometry, built once when it is
+    # loaded. OCC recomputes sub shape lists on every attribute access, so
+    # they are fetched once here and the maps are only built when needed.
+    def __init__(self, shape):
+        self.shape = shape
+        # viewer data of the geometry, set once it is drawn
+        self.tessellation = None
+        self._face_normals = None
+        self._measures = {}
+        self.solids = shape.solids
+        self.faces = shape.faces
+        self.edges = shape.edges
+        # glued geometries list shared faces twice, the last index is used
+        self.face_index = {face: i for i, face in enumerate(self.faces)}
+
+    @functools.cached_property
+    def face_viewer_index(self):
+        # The viewer draws every distinct face once, numbered in order of
+        # first occurrence, so glued geometries have fewer viewer faces.
+        index = {}
+        return [index.setdefault(face, len(index)) for face in self.faces]
+
+    @functools.cached_property
+    def viewer_faces(self):
+        # face index of every viewer face, the last one of shared faces
+        result = [0] * (max(self.face_viewer_index, default=-1) + 1)
+        for i, v in enumerate(self.face_viewer_index):
+            result[v] = i
+        return result
+
+    @functools.cached_property
+    def edge_index(self):
+        return {edge: i for i, edge in enumerate(self.edges)}
+
+    @functools.cached_property
+    def vertices(self):
+        points = [vertex.p for vertex in self.shape.vertices]
+        return np.array([(p.x, p.y, p.z) for p in points], dtype=float).reshape(-1, 3)
+
+    @functools.cached_property
+    def solid_faces(self):
+        face_index = self.face_index
+        return [[face_index[face] for face in solid.faces] for solid in self.solids]
+
+    @functools.cached_property
+    def face_solids(self):
+        return _invert(self.solid_faces, len(self.faces))
+
+    @functools.cached_property
+    def face_edges(self):
+        edge_index = self.edge_index
+        return [[edge_index[edge] for edge in face.edges] for face in self.faces]
+
+    @functools.cached_property
+    def edge_faces(self):
+        return _invert(self.face_edges, len(self.edges))
+
+    @functools.cached_property
+    def solid_neighbours(self):
+        # solids sharing a face
+        face_solids = self.face_solids
+        return [
+            sorted({j for face in faces for j in face_solids[face]} - {i})
+            for i, faces in enumerate(self.solid_faces)
+        ]
+
+    @property
+    def face_normals(self):
+        if self.tessellation is None:
+            return np.zeros((len(self.faces), 3))
+        if self._face_normals is None:
+            # the tessellation numbers faces like the viewer
+            normals = face_normals(self.tessellation, len(self.viewer_faces))
+            self._face_normals = normals[self.face_viewer_index]
+        return self._face_normals
+
+    @functools.cached_property
+    def edge_radii(self):
+        # curvature radius of every edge from the circle through three of its
+        # points, inf for straight edges
+        lengths = self.measures("edges")
+        tolerance = 1e-9 * lengths.max(initial=0)
+        points = []
+        for edge, length in zip(self.edges, lengths):
+            if length <= tolerance:
+                # degenerated edge (e.g. the pole of a sphere) has no curve
+                points += [(0, 0, 0)] * 3
+                continue
+            t0, t1 = edge.parameter_interval
+            for t in (t0, t0 + (t1 - t0) / 3, t0 + 2 * (t1 - t0) / 3):
+                p = edge.Value(t)
+                points.append((p.x, p.y, p.z))
+        points = np.array(points, dtype=float).reshape(-1, 3, 3)
+        a = np.linalg.norm(points[:, 1] - points[:, 0], axis=1)
+        b = np.linalg.norm(points[:, 2] - points[:, 1], axis=1)
+        c = np.linalg.norm(points[:, 0] - points[:, 2], axis=1)
+        double_area = np.linalg.norm(
+            np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 0]), axis=1
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            radii = a * b * c / (2 * double_area)
+        radii[~(double_area > 1e-12 * (a * b + 1e-300))] = np.inf
+        return radii
+
+    def measures(self, shape_type):
+        # volume of solids, area of faces, length of edges
+        if shape_type not in self._measures:
+            shapes = getattr(self, shape_type)
+            self._measures[shape_type] = np.fromiter(
+                (shape.mass for shape in shapes), float, len(shapes)
+            )
+        return self._measures[shape_type]
+
+    def is_planar(self, tolerance):
+        # all vertices in the z = 0 plane
+        z = self.vertices[:, 2]
+        return len(z) == 0 or np.abs(z).max() <= tolerance
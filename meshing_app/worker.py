@@ -0,0 +1,265 @@
+import concurrent.futures
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+from .meshing import generate_mesh, generate_mesh_parallel
+from .timing import JobTimings, near_memory_limit, peak_rss, resource
+
+# Every job runs in a fresh process. With MESHING_APP_WARM_WORKER=1 jobs are
+# forked from a server process that imported netgen already (multiprocessing
+# forkserver, POSIX only), so they do not pay for the netgen import.
+warm_worker = (
+    os.environ.get("MESHING_APP_WARM_WORKER", "0") == "1"
+    and "forkserver" in multiprocessing.get_all_start_methods()
+)
+if warm_worker:
+    _ctx = multiprocessing.get_context("forkserver")
+    _ctx.set_forkserver_preload(
+        ["netgen.occ", "netgen.libngpy._meshing", "meshing_app.worker"]
+    )
+else:
+    _ctx = multiprocessing.get_context("spawn")
+_warm_up_lock = threading.Lock()
+_warmed_up = False
+
+
+def _ready():
+    pass
+
+
+def warm_up():
+    # Import netgen in this process and start the fork server with its
+    # imports, so that neither the first geometry import nor the first mesh
+    # of a session waits for them. Runs once per process.
+    global _warmed_up
+    with _warm_up_lock:
+        if _warmed_up:
+            return
+        _warmed_up = True
+    import netgen.occ  # noqa: F401, only imported to have it loaded
+
+    if warm_worker:
+        process = _ctx.Process(target=_ready)
+        process.start()
+        process.join()
+
+
+def run_in_process(target, *args):
+    # target(*args) in a worker process, which raises if the process dies
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=_ctx) as executor:
+        return executor.submit(target, *args).result()
+
+
+def _run_meshing(
+    brep_file, dim, parameters, overrides, output, parallel, workers, limits, messages
+):
+    import netgen.occ as ngocc
+    import netgen.libngpy._meshing as ngmeshing
+
+    if hasattr(os, "setsid"):
+        # own process group, so that cancelling also stops per-solid workers
+        os.setsid()
+    if resource is not None:
+        # the per-solid workers of parallel jobs lower them to their share
+        memory, cpu = limits
+        if memory:
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        if cpu:
+            # SIGXCPU at the soft limit, the hard limit would SIGKILL
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    stop = threading.Event()
+
+    def report_status():
+        while not stop.wait(0.5):
+            stage, percent = ngmeshing._GetStatus()
+            messages.put(("status", stage, percent))
+
+    threading.Thread(target=report_status, daemon=True).start()
+    timings = JobTimings()
+    try:
+        messages.put(("status", "Loading geometry", 0.0))
+        with timings.phase("load_brep"):
+            shape = ngocc.OCCGeometry(brep_file).shape
+        with timings.phase("generate_mesh"):
+            if parallel and dim == 3 and len(shape.solids) > 1:
+                mesh, solid_timings = generate_mesh_parallel(
+                    shape, parameters, overrides, workers, limits
+                )
+                messages.put(("timings", solid_timings))
+            else:
+                mesh = generate_mesh(shape, dim, parameters, overrides)
+        messages.put(("status", "Saving mesh", 100.0))
+        with timings.phase("mesh_save"):
+            mesh.Save(output)
+        # the per-solid workers are the only children of this process
+        messages.put(("phases", timings.phases, peak_rss(children=True)))
+    except MemoryError:
+        messages.put(("error", _limit_error("memory", limits)))
+        return
+    except concurrent.futures.BrokenExecutor:
+        # a per-solid worker was killed, most likely by its share of the limits
+        messages.put(("error", _limit_error("worker", limits)))
+        return
+    except Exception as e:
+        # netgen reports failed allocations as a failed meshing
+        if "bad_alloc" in str(e) or near_memory_limit():
+            messages.put(("error", _limit_error("memory", limits)))
+        else:
+            messages.put(("error", str(e)))
+        return
+    finally:
+        stop.set()
+    messages.put(("done", output))
+
+
+_crashes = ("SIGSEGV", "SIGABRT", "SIGBUS")
+
+
+def _limit_error(cause, limits, exitcode=None):
+    # readable error for a job killed by its limits (see Scheduler.limits)
+    memory, cpu = limits
+    crashes = [-getattr(signal, name) for name in _crashes if hasattr(signal, name)]
+    if exitcode and exitcode == -getattr(signal, "SIGXCPU", 0):
+        return "Meshing exceeded its CPU time limit"
+    if cause == "memory" or (memory and exitcode in crashes):
+        # allocations failing under RLIMIT_AS often crash netgen instead of raising
+        if memory:
+            return "Meshing exceeded its memory limit"
+        return "Meshing ran out of memory"
+    if cause == "worker":
+        if memory or cpu:
+            return "A meshing worker exceeded its share of the memory or CPU limit"
+        return "A meshing worker exited unexpectedly"
+    return f"Meshing process exited with code {exitcode}"
+
+
+class MeshingJob:
+    def __init__(
+        self, brep_file, dim, parameters, overrides, output, parallel=False
+    ):
+        self.brep_file = brep_file
+        self.dim = dim
+        self.parameters = parameters
+        self.overrides = overrides
+        self.output = output
+        self.parallel = parallel
+        # bytes of address space and CPU seconds of the job
+        self.limits = (0, 0)
+        self.scheduler = None
+        self.state = "pending"
+        self.stage = ""
+        self.progress = 0.0
+        self.error = None
+        # seconds of volume meshing per solid index, for parallel jobs
+        self.solid_timings = {}
+        # seconds per phase and peak memory of the worker process
+        self.phases = {}
+        self.peak_rss = None
+        self._messages = _ctx.Queue()
+        self._process = None
+
+    @property
+    def running(self):
+        return self.state in ("pending", "queued", "running")
+
+    @property
+    def finished(self):
+        # not running anymore or its process exited
+        if not self.running:
+            return True
+        return self._process is not None and not self._process.is_alive()
+
+    def start(self, workers=None):
+        if self.state not in ("pending", "queued"):
+            # cancelled before the scheduler got to it
+            return self
+        self._process = _ctx.Process(
+            target=_run_meshing,
+            args=(
+                self.brep_file,
+                self.dim,
+                self.parameters,
+                self.overrides,
+                self.output,
+                self.parallel,
+                workers,
+                self.limits,
+                self._messages,
+            ),
+        )
+        self._process.start()
+        self.state = "running"
+        return self
+
+    def cancel(self):
+        if self.scheduler is None:
+            self._cancel()
+            return
+        # the scheduler does not start the job meanwhile
+        with self.scheduler._condition:
+            self._cancel()
+            self.scheduler.remove(self)
+
+    def _cancel(self):
+        if not self.running:
+            return
+        self.state = "cancelled"
+        if self._process is not None and self._process.is_alive():
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except (AttributeError, OSError):
+                self._process.kill()
+            self._process.join()
+
+    def poll(self, timeout=0.2):
+        if self._process is None:
+            # queued, the scheduler starts the process
+            time.sleep(timeout)
+            return
+        try:
+            message = self._messages.get(timeout=timeout)
+        except queue.Empty:
+            if self._process.is_alive():
+                return
+            try:
+                # the worker may have exited right after sending its result
+                message = self._messages.get(timeout=1)
+            except queue.Empty:
+                if self.running:
+                    self.state = "failed"
+                    self.error = _limit_error(
+                        "exit", self.limits, self._process.exitcode
+                    )
+                return
+        if not self.running:
+            return
+        if message[0] == "status":
+            self.stage, self.progress = message[1], message[2]
+        elif message[0] == "timings":
+            self.solid_timings = message[1]
+        elif message[0] == "phases":
+            self.phases, self.peak_rss = message[1], message[2]
+        elif message[0] == "error":
+            self.state = "failed"
+            self.error = message[1]
+        elif message[0] == "done":
+            self.state = "done"
+            self.progress = 100.0
+
+    def wait(self, on_progress=None, interval=0.2):
+        last = None
+        while self.running:
+            self.poll(timeout=interval)
+            if on_progress is not None and (self.stage, self.progress) != last:
+                last = (self.stage, self.progress)
+                on_progress(self.stage, self.progress)
+        if self._process is not None:
+            self._process.join()
+        if self.scheduler is not None:
+            # free its slots right away
+            self.scheduler.remove(self)
+        return self.state
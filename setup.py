@@ -27,6 +27,9 @@ setup(
     dependencies=["netgen"],
     packages=find_packages("."),
     package_data={name: ["*.png"]},
-    install_requires=[],
-    entry_points={"webapp.plugin": ["simple = meshing_app.appconfig"]},
+    install_requires=["numpy"],
+    entry_points={
+        "webapp.plugin": ["simple = meshing_app.appconfig"],
+        "console_scripts": ["meshing-app = meshing_app.cli:main"],
+    },
 )
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from meshing_app.cache import FileCache, GeometryCache, hash_json, mesh_key
+
+
+def write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return str(path)
+
+
+def test_mesh_key():
+    key = mesh_key("geometry", {"maxh": 1.0}, 3, {"faces": []})
+    assert key == mesh_key("geometry", {"maxh": 1.0}, 3, {"faces": []})
+    assert key != mesh_key("geometry", {"maxh": 0.5}, 3, {"faces": []})
+    assert key != mesh_key("geometry", {"maxh": 1.0}, 2, {"faces": []})
+    assert key != mesh_key("geometry", {"maxh": 1.0}, 3, {"faces": []}, parallel=True)
+    assert hash_json({"a": 1, "b": 2}) == hash_json({"b": 2, "a": 1})
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path):
+    cache = FileCache(str(tmp_path / "cache"), max_size=25, suffix=".vol")
+    source = write(tmp_path / "source", 10)
+    assert cache.get("a") is None
+    for age, key in enumerate(("a", "b")):
+        cache.put(key, source)
+        os.utime(cache.path(key), (1000 + age, 1000 + age))
+    # a hit makes a the most recently used entry
+    assert cache.get("a") == cache.path("a")
+    cache.put("c", source)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_file_cache_ignores_other_files(tmp_path):
+    directory = tmp_path / "cache"
+    cache = FileCache(str(directory), max_size=5, suffix=".vol")
+    other = write(directory / "other.json", 100)
+    cache.put("a", write(tmp_path / "source", 4))
+    assert os.path.exists(other)
+    assert cache.get("a") is not None
+
+
+def test_geometry_cache(tmp_path):
+    ngocc = pytest.importorskip("netgen.occ")
+    directory = str(tmp_path / "geometries")
+    cache = GeometryCache(directory, max_size=1024**3, max_items=1)
+    box = ngocc.Box((0, 0, 0), (1, 1, 1))
+    box.faces[0].name = "inlet"
+    cache.put("box", box)
+    assert cache.has("box") and not cache.has("other")
+
+    shape = cache.get("box")
+    assert shape.faces[0].name == "inlet"
+    # sessions get copies, names set on one do not show up in the next
+    shape.faces[1].name = "outlet"
+    assert cache.get("box").faces[1].name != "outlet"
+
+    cache.put("cylinder", ngocc.Cylinder((0, 0, 0), (0, 0, 1), 1, 1))
+    assert list(cache._shapes) == ["cylinder"]
+    # read back from disk, with the names BREP files do not store
+    shape = GeometryCache(directory, max_size=1024**3, max_items=1).get("box")
+    assert len(shape.faces) == 6 and shape.faces[0].name == "inlet"
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from meshing_app.meshing import (
+    case_settings,
+    mesh_case,
+    meshing_parameters,
+    settings_overrides,
+    table_overrides,
+)
+
+
+def saved_case():
+    pytest.importorskip("webapp_client")
+    ngocc = pytest.importorskip("netgen.occ")
+    from meshing_app.app import MeshingApp
+
+    app = MeshingApp()
+    layout = app.main_layout
+    layout.build_from_shape(ngocc.Box((0, 0, 0), (1, 1, 1)), "box")
+    settings = layout.global_settings
+    settings.mesh_granularity.ui_model_value = "coarse"
+    settings.maxh.ui_model_value = 0.4
+    settings.curvature_safety.ui_model_value = 1.5
+    settings.segments_per_edge.ui_model_value = 0.5
+    settings.grading.ui_model_value = 0.5
+    layout.face_table.set_names([0], "inlet")
+    layout.face_table.set_maxhs([1], 0.2)
+    return layout, app.dump()
+
+
+def test_dumped_case_settings():
+    layout, dumped = saved_case()
+    settings = case_settings(json.loads(json.dumps(dumped)))
+    assert settings["mesh_dimension"] == 3
+    assert settings["mesh_granularity"] == "coarse"
+    assert meshing_parameters(settings) == layout.global_settings.get_meshing_parameters()
+    assert settings_overrides(settings)["faces"] == [[0, "inlet", None], [1, None, 0.2]]
+
+
+def test_cleared_overrides():
+    # cleared names and maxh replace those of the geometry file
+    table = {
+        "name_index": [0, 1],
+        "name": ["inlet", None],
+        "maxh_index": [0, 2],
+        "maxh": [None, 0.2],
+    }
+    assert table_overrides(table) == [
+        [0, "inlet", 1e99],
+        [1, "", None],
+        [2, None, 0.2],
+    ]
+
+
+def test_mesh_dumped_case(tmp_path):
+    _, dumped = saved_case()
+    import netgen.occ as ngocc
+
+    geometry, case = tmp_path / "box.brep", tmp_path / "box.json"
+    ngocc.Box((0, 0, 0), (1, 1, 1)).WriteBrep(str(geometry))
+    case.write_text(json.dumps(dumped))
+    result = mesh_case(str(geometry), str(case), str(tmp_path / "box.vol"))
+    assert result["elements"] > 0
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from meshing_app import estimate
+from meshing_app.estimate import check_limits, estimate_mesh
+from meshing_app.topology import Topology
+
+
+def unset_maxhs(topology):
+    return {
+        shape_type: np.full(len(getattr(topology, shape_type)), 1e99)
+        for shape_type in ("solids", "faces", "edges")
+    }
+
+
+@pytest.mark.parametrize("maxh", [0.3, 0.1])
+def test_estimate_within_a_factor_of_netgen(maxh):
+    ngocc = pytest.importorskip("netgen.occ")
+    for shape in (
+        ngocc.Box((0, 0, 0), (1, 1, 1)),
+        ngocc.Cylinder((0, 0, 0), (0, 0, 1), 0.5, 2),
+    ):
+        topology = Topology(shape)
+        result = estimate_mesh(topology, {"maxh": maxh}, unset_maxhs(topology))
+        elements = ngocc.OCCGeometry(shape).GenerateMesh(maxh=maxh).ne
+        assert elements / 3 < result["elements"] < elements * 3
+
+
+def test_estimate_grows_with_refinement():
+    ngocc = pytest.importorskip("netgen.occ")
+    topology = Topology(ngocc.Box((0, 0, 0), (1, 1, 1)))
+    maxhs = unset_maxhs(topology)
+    coarse = estimate_mesh(topology, {"maxh": 0.3}, maxhs)
+    fine = estimate_mesh(topology, {"maxh": 0.1}, maxhs)
+    assert fine["elements"] > coarse["elements"]
+    maxhs["faces"][0] = 0.05
+    local = estimate_mesh(topology, {"maxh": 0.3}, maxhs)
+    assert local["elements"] > coarse["elements"]
+    assert local["seconds"] > coarse["seconds"] and local["memory"] > coarse["memory"]
+    surface = estimate_mesh(topology, {"maxh": 0.3}, maxhs, dim=2)
+    assert surface["elements"] == surface["surface_elements"]
+    assert surface["elements"] == local["surface_elements"]
+
+
+def test_check_limits(monkeypatch):
+    monkeypatch.setattr(estimate, "max_elements", 1000)
+    monkeypatch.setattr(estimate, "max_memory", 0)
+    assert check_limits({"elements": 1000, "memory": 10**12}) is None
+    assert "elements" in check_limits({"elements": 1001, "memory": 0})
+    monkeypatch.setattr(estimate, "max_elements", 0)
+    monkeypatch.setattr(estimate, "max_memory", 1024**3)
+    assert "GB" in check_limits({"elements": 10**9, "memory": 2 * 1024**3})
@@ -0,0 +1,66 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from meshing_app.export import compress_file, export_mesh, formats, mesh_cells
+
+
+def glued_mesh(**parameters):
+    ngocc = pytest.importorskip("netgen.occ")
+    shape = ngocc.Glue(
+        [ngocc.Box((0, 0, 0), (1, 1, 1)), ngocc.Box((1, 0, 0), (2, 1, 1))]
+    )
+    shape.solids[0].name = "steel"
+    shape.solids[1].name = "air"
+    shape.faces.Min(ngocc.X).name = "inlet"
+    return ngocc.OCCGeometry(shape).GenerateMesh(maxh=0.5, **parameters)
+
+
+def test_mesh_cells():
+    mesh = glued_mesh()
+    (cell_type, nodes, index), = mesh_cells(mesh.Elements3D())
+    assert cell_type == "tetra" and nodes.shape == (mesh.ne, 4)
+    assert nodes.min() == 0 and nodes.max() < len(mesh.Points())
+    assert sorted(np.unique(index).tolist()) == [1, 2]
+    mesh.SecondOrder()
+    (cell_type, nodes, _), = mesh_cells(mesh.Elements2D())
+    assert cell_type == "triangle6" and nodes.shape[1] == 6
+
+
+def test_compress_file(tmp_path):
+    source = tmp_path / "mesh.vol"
+    source.write_bytes(b"mesh" * 1000)
+    target = compress_file(str(source), str(tmp_path / "mesh.vol.gz"), "gzip")
+    with gzip.open(target) as f:
+        assert f.read() == source.read_bytes()
+
+
+def test_netgen_formats(tmp_path):
+    mesh = glued_mesh()
+    assert export_mesh(mesh, "mesh.vol", "netgen", None) == "mesh.vol"
+    target = str(tmp_path / "mesh.msh")
+    assert export_mesh(mesh, "mesh.vol", "gmsh2", target) == target
+    with open(target) as f:
+        assert f.readline().strip() == "$MeshFormat"
+
+
+def test_vtu_keeps_boundaries_and_names(tmp_path):
+    meshio = pytest.importorskip("meshio")
+    assert "vtu" in formats
+    mesh = glued_mesh()
+    target = export_mesh(mesh, None, "vtu", str(tmp_path / "mesh.vtu"))
+    result = meshio.read(target)
+    assert [cells.type for cells in result.cells] == ["tetra", "triangle"]
+    assert [len(cells) for cells in result.cells] == [
+        mesh.ne,
+        len(mesh.Elements2D()),
+    ]
+    region, boundary = result.cell_data["region"], result.cell_data["boundary"]
+    assert sorted(np.unique(region[0]).tolist()) == [1, 2]
+    assert np.all(boundary[0] == 0) and np.all(region[1] == 0)
+    assert boundary[1].min() == 1
+    names = [key for key in result.cell_data if key.startswith("region:")]
+    assert names and {"region:steel", "region:air", "boundary:inlet"} <= set(
+        names[0].split("-")
+    )
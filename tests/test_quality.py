@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from meshing_app.quality import (
+    _trig_quality,
+    bad_elements,
+    element_quality,
+    highlight_mesh,
+    histogram,
+    mesh_quality,
+    worst_elements,
+)
+
+regular_tet = np.array(
+    [(1, 1, 1), (1, -1, -1), (-1, 1, -1), (-1, -1, 1)], dtype=float
+)
+
+
+def test_regular_and_flat_tetrahedra():
+    flat = np.array([(0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0)], dtype=float)
+    points = np.vstack([regular_tet, flat])
+    quality = element_quality(points, np.array([[0, 1, 2, 3], [4, 5, 6, 7]]))
+    assert quality["volume"][0] == pytest.approx(8 / 3)
+    assert quality["aspect_ratio"][0] == pytest.approx(1)
+    dihedral = np.degrees(np.arccos(1 / 3))
+    assert quality["min_angle"][0] == pytest.approx(dihedral, abs=1e-3)
+    assert quality["max_angle"][0] == pytest.approx(dihedral, abs=1e-3)
+    assert quality["volume"][1] == 0
+    assert bad_elements(quality).tolist() == [False, True]
+
+
+def test_triangles():
+    points = np.array([(0, 0, 0), (1, 0, 0), (0.5, 3**0.5 / 2, 0), (0, 1, 0)])
+    nodes = np.array([[0, 1, 2], [0, 1, 3]])
+    quality = element_quality(points, nodes, _trig_quality)
+    assert quality["aspect_ratio"][0] == pytest.approx(1)
+    assert quality["min_angle"][0] == pytest.approx(60, abs=1e-3)
+    assert quality["max_angle"][1] == pytest.approx(90, abs=1e-3)
+    assert quality["volume"][1] == pytest.approx(0.5)
+
+
+def test_worst_elements_and_histogram():
+    quality = {"aspect_ratio": np.array([1.0, 7.0, np.nan, 3.0])}
+    # degenerated elements are the worst
+    assert worst_elements(quality, 3).tolist() == [2, 1, 3]
+    assert len(worst_elements(quality, 0)) == 0
+    counts, edges = histogram(np.array([1.0, 2.0, 50.0, np.nan]), 4, 1, 5)
+    # 50 counts to the last bin
+    assert counts.tolist() == [1, 1, 0, 1] and edges[-1] == 5
+    counts, edges = histogram(np.array([1.0, 10.0, 100.0]), 2, log=True)
+    assert counts.sum() == 3 and edges.tolist() == pytest.approx([1, 10, 100])
+
+
+def test_mesh_quality():
+    ngocc = pytest.importorskip("netgen.occ")
+    box = ngocc.Box((0, 0, 0), (1, 1, 1))
+    mesh = ngocc.OCCGeometry(box).GenerateMesh(maxh=0.3)
+    quality = mesh_quality(mesh)
+    assert quality["dim"] == 3 and quality["skipped"] == 0
+    assert len(quality["volume"]) == mesh.ne
+    assert quality["volume"].sum() == pytest.approx(1, rel=1e-4)
+    assert np.all(quality["aspect_ratio"] >= 1 - 1e-4)
+    mask = np.zeros(mesh.ne, dtype=bool)
+    mask[:3] = True
+    highlight = highlight_mesh(mesh, quality, mask)
+    assert len(highlight.Elements2D()) == len(mesh.Elements2D()) + 12
+
+    face = ngocc.WorkPlane().Rectangle(1, 1).Face()
+    mesh = ngocc.OCCGeometry(face, dim=2).GenerateMesh(maxh=0.3)
+    quality = mesh_quality(mesh)
+    assert quality["dim"] == 2
+    assert quality["volume"].sum() == pytest.approx(1, rel=1e-4)
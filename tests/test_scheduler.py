@@ -0,0 +1,103 @@
+from meshing_app.scheduler import Scheduler, Slots
+
+
+class FakeJob:
+    def __init__(self, name):
+        self.name = name
+        self.state = "pending"
+        self.stage = None
+        self.workers = None
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed", "cancelled")
+
+    def start(self, workers=None):
+        self.state = "running"
+        self.workers = workers
+        return self
+
+
+def make_scheduler(tmp_path, n=1, budget=0):
+    return Scheduler(Slots(str(tmp_path / "slots"), n, budget), (0, 0), interval=60)
+
+
+def finish(scheduler, job):
+    job.state = "done"
+    with scheduler._condition:
+        scheduler._schedule()
+
+
+def test_fair_share_between_sessions(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    a1, a2, a3, b1 = (FakeJob(name) for name in ("a1", "a2", "a3", "b1"))
+    for job in (a1, a2, a3):
+        scheduler.submit(job, session="a")
+    scheduler.submit(b1, session="b")
+    assert a1.state == "running"
+    # b has no running job, so its job goes ahead of a's queued ones
+    assert [e["job"] for e in scheduler._waiting()] == [b1, a2, a3]
+    finish(scheduler, a1)
+    assert b1.state == "running" and a2.state == "queued"
+    finish(scheduler, b1)
+    assert a2.state == "running"
+    finish(scheduler, a2)
+    assert a3.state == "running"
+
+
+def test_started_jobs_break_ties(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    a1, a2, b1, b2 = (FakeJob(name) for name in ("a1", "a2", "b1", "b2"))
+    scheduler.submit(a1, session="a")
+    scheduler.submit(a2, session="a")
+    scheduler.submit(b1, session="b")
+    finish(scheduler, a1)
+    assert b1.state == "running"
+    scheduler.submit(b2, session="b")
+    finish(scheduler, b1)
+    # both sessions started one job, a's was submitted first
+    assert a2.state == "running" and b2.state == "queued"
+
+
+def test_priority_goes_first(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    running, low, high = FakeJob("running"), FakeJob("low"), FakeJob("high")
+    scheduler.submit(running, session="a")
+    scheduler.submit(low, session="b")
+    scheduler.submit(high, session="a", priority=1)
+    finish(scheduler, running)
+    assert high.state == "running" and low.state == "queued"
+
+
+def test_queue_position(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    jobs = [FakeJob(i) for i in range(3)]
+    for job in jobs:
+        scheduler.submit(job, session="a")
+    assert jobs[1].stage == "Queued, position 1 of 2"
+    assert jobs[2].stage == "Queued, position 2 of 2"
+    jobs[1].state = "cancelled"
+    scheduler.remove(jobs[1])
+    assert jobs[2].stage == "Queued, position 1 of 1"
+
+
+def test_cpus_and_memory_budget(tmp_path):
+    scheduler = make_scheduler(tmp_path, n=4, budget=100)
+    wide, big, small = FakeJob("wide"), FakeJob("big"), FakeJob("small")
+    scheduler.submit(wide, cpus=8, memory=60)
+    assert wide.workers == 4
+    scheduler.submit(big, cpus=1, memory=60)
+    scheduler.submit(small, cpus=1, memory=10)
+    # the first job in the queue blocks the ones behind it
+    assert big.state == "queued" and small.state == "queued"
+    finish(scheduler, wide)
+    assert big.state == "running" and small.state == "running"
+
+
+def test_job_over_budget_runs_alone(tmp_path):
+    slots = Slots(str(tmp_path / "slots"), 2, budget=100)
+    held = slots.acquire(1, 500)
+    assert held is not None
+    assert slots.acquire(1, 1) is None
+    slots.release(held)
+    assert slots.acquire(2, 1) is not None
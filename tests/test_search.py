@@ -0,0 +1,81 @@
+import pytest
+
+
+class Viewer:
+    # stand-in for the geometry viewer, colours are not checked here
+    def __init__(self, n_faces, n_edges):
+        self._webgui_data = {
+            "colors": [(0.7, 0.7, 0.7, 1)] * n_faces,
+            "edge_colors": [(0, 0, 0, 1)] * n_edges,
+        }
+
+    def set_color(self, faces, edges):
+        pass
+
+
+def table(shape_type):
+    pytest.importorskip("webapp_client")
+    ngocc = pytest.importorskip("netgen.occ")
+    from meshing_app.app import ShapeTable
+    from meshing_app.tessellation import tessellate
+    from meshing_app.topology import Topology
+
+    # a unit cube glued to a 2 x 1 x 1 box, face 1 and 6 are the shared face
+    shape = ngocc.Glue(
+        [ngocc.Box((0, 0, 0), (1, 1, 1)), ngocc.Box((1, 0, 0), (3, 1, 1))]
+    )
+    topology = Topology(shape)
+    topology.tessellation = tessellate(shape)
+    names = {0: "Inlet", 2: "wall_front", 3: "wall_back", 4: "bottom2", 7: "outlet"}
+    for i, name in names.items():
+        topology.faces[i].name = name
+    shapes = getattr(topology, shape_type)
+    viewer = Viewer(len(topology.viewer_faces), len(topology.edges))
+    result = ShapeTable(viewer, shape_type)
+    result.set_shapes(shapes, topology)
+    return result
+
+
+def search(table, text):
+    table.search({"value": text})
+    return list(table.view)
+
+
+def test_index_ranges():
+    faces = table("faces")
+    assert search(faces, "3") == [3]
+    assert search(faces, "2-4") == [2, 3, 4]
+    assert search(faces, "face 10 - 99") == [10, 11]
+    assert search(faces, "") == list(range(12))
+
+
+def test_names():
+    faces = table("faces")
+    # substrings ignore case, longer queries narrow down the last result
+    assert search(faces, "in") == [0]
+    assert search(faces, "inl") == [0]
+    assert search(faces, "wall") == [2, 3]
+    # globs match the whole name
+    assert search(faces, "wall_*") == [2, 3]
+    assert search(faces, "*let") == [0, 7]
+    assert search(faces, "all*") == []
+    assert search(faces, "re:^(in|out)let$") == [0, 7]
+    assert search(faces, r"re:\d") == [4]
+    assert search(faces, r"/\D2/") == [4]
+    assert search(faces, "re:(") == []
+
+
+def test_rules():
+    faces = table("faces")
+    assert search(faces, "area > 1") == [8, 9, 10, 11]
+    assert search(faces, "area <= 1") == list(range(8))
+    assert search(faces, "area < x") == []
+    assert search(faces, "normal +z") == [5, 11]
+    assert search(faces, "normal -x") == [0]
+    assert search(faces, "normal 0, 0, -1") == [4, 10]
+    assert search(faces, "adjacent 1") == [6, 7, 8, 9, 10, 11]
+    assert search(table("solids"), "adjacent 0") == [1]
+    assert search(table("solids"), "volume >= 2") == [1]
+    edges = table("edges")
+    assert search(edges, "normal +z") == []
+    assert search(edges, "length < 2") == search(edges, "length <= 1")
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from meshing_app.tessellation import (
+    boundary_color,
+    decimate,
+    face_normals,
+    n_triangles,
+    tessellate,
+    tessellations,
+)
+
+
+def test_face_normals_of_a_box():
+    ngocc = pytest.importorskip("netgen.occ")
+    data = tessellate(ngocc.Box((0, 0, 0), (1, 1, 1)))
+    assert n_triangles(data) == 12
+    normals = face_normals(data, 6)
+    assert np.allclose(np.abs(normals).sum(axis=1), 1)
+    assert np.allclose(normals.sum(axis=0), 0)
+
+
+def test_decimated_preview():
+    ngocc = pytest.importorskip("netgen.occ")
+    data = tessellate(ngocc.Sphere((0, 0, 0), 1))
+    preview = decimate(data, 8)
+    assert 0 < n_triangles(preview) < n_triangles(data)
+    points = preview["Bezier_trig_points"]
+    assert len(points) == 6 and len({len(p) for p in points[:3]}) == 1
+    # vertices stay on the grid cells of the sphere's surface
+    xyz = np.concatenate([p.reshape(-1, 4)[:, :3] for p in points[:3]])
+    radius = np.linalg.norm(xyz, axis=1)
+    assert radius.max() <= 1 + 1e-6 and radius.min() > 0.5
+
+
+def test_preview_only_for_large_geometries():
+    ngocc = pytest.importorskip("netgen.occ")
+    shape = ngocc.Sphere((0, 0, 0), 1)
+    full, preview = tessellations(None, lambda: tessellate(shape), 8, 10**9)
+    assert full is not None and preview is None
+    full, preview = tessellations(None, lambda: tessellate(shape), 8, 1)
+    assert n_triangles(preview) < n_triangles(full)
+    # without compute only cached geometries are returned
+    assert tessellations(None) == (None, None)
+
+
+def test_boundary_color():
+    assert boundary_color(None) == boundary_color("default")
+    assert boundary_color("inlet") == boundary_color("inlet")
+    assert len(boundary_color("outlet")) == 4
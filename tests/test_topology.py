@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from meshing_app.topology import Topology, _invert, min_over, pairs
+
+
+def test_invert():
+    assert _invert([[0, 2], [2], []], 4) == [[0], [], [0, 1], []]
+
+
+def test_pairs_and_min_over():
+    groups = [[1, 2], [], [0]]
+    owners, members = pairs(groups)
+    assert owners.tolist() == [0, 0, 2] and members.tolist() == [1, 2, 0]
+    values = np.array([3.0, 1.0, 2.0])
+    assert min_over(values, groups, np.inf).tolist() == [1.0, np.inf, 3.0]
+
+
+def test_glued_boxes():
+    ngocc = pytest.importorskip("netgen.occ")
+    boxes = [ngocc.Box((0, 0, 0), (1, 1, 1)), ngocc.Box((1, 0, 0), (2, 1, 1))]
+    shape = ngocc.Glue(boxes)
+    topology = Topology(shape)
+    # the shared face is listed by both solids, the viewer draws it once
+    assert len(topology.faces) == 12
+    assert len(topology.viewer_faces) == 11
+    shared = [i for i, solids in enumerate(topology.face_solids) if len(solids) == 2]
+    assert len(shared) == 1
+    assert topology.face_solids[shared[0]] == [0, 1]
+    assert topology.solid_neighbours == [[1], [0]]
+    for i, faces in enumerate(topology.solid_faces):
+        assert all(i in topology.face_solids[face] for face in faces)
+    for j, faces in enumerate(topology.edge_faces):
+        assert all(j in topology.face_edges[face] for face in faces)
+    viewer_index = topology.face_viewer_index
+    assert all(viewer_index[face] == v for v, face in enumerate(topology.viewer_faces))
+    np.testing.assert_allclose(topology.measures("faces"), 1.0)
+    np.testing.assert_allclose(topology.measures("solids"), 1.0)
+    assert not topology.is_planar(1e-9)
+
+
+def test_edge_radii():
+    ngocc = pytest.importorskip("netgen.occ")
+    topology = Topology(ngocc.Cylinder((0, 0, 0), (0, 0, 1), 0.5, 2))
+    radii = topology.edge_radii
+    lengths = topology.measures("edges")
+    # circles have radius 0.5, the seam is straight
+    np.testing.assert_allclose(radii[np.isfinite(radii)], 0.5)
+    np.testing.assert_allclose(lengths[np.isinf(radii)], 2.0)